@@ -0,0 +1,160 @@
+"""
+Курсорная (keyset) пагинация.
+
+Вместо OFFSET страница выбирается условием «после/до последней показанной
+строки» по полю сортировки с дополнительной сортировкой по id, поэтому
+стоимость запроса не растёт с номером страницы, а порядок стабилен при
+совпадающих значениях поля.
+"""
+import base64
+import binascii
+import datetime
+import json
+from functools import cached_property
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    # DjangoJSONEncoder обрезает микросекунды, а курсору нужна точная граница
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(value, pk, direction):
+    payload = json.dumps([value, pk, direction], cls=CursorEncoder)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    value, pk, direction = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    if direction not in (NEXT, PREVIOUS):
+        raise ValueError('Некорректное направление курсора')
+    return value, int(pk), direction
+
+
+def approximate_count(queryset):
+    """Оценка числа строк по плану запроса вместо COUNT(*)."""
+    if queryset.query.is_empty():
+        return 0
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class KeysetPage:
+    def __init__(self, object_list, queryset, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.queryset = queryset
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    @cached_property
+    def approximate_total(self):
+        return approximate_count(self.queryset)
+
+
+class KeysetPaginator:
+    """Пагинатор по полю `ordering` ('name', '-created_at', ...) с добором по id."""
+
+    def __init__(self, queryset, ordering, per_page=24):
+        self.queryset = queryset
+        self.descending = ordering.startswith('-')
+        self.field = ordering.lstrip('-')
+        self.per_page = per_page
+
+    def _to_python(self, value):
+        try:
+            return self.queryset.model._meta.get_field(self.field).to_python(value)
+        except FieldDoesNotExist:
+            return value
+
+    def _order(self, reverse=False):
+        descending = self.descending != reverse
+        prefix = '-' if descending else ''
+        return [f'{prefix}{self.field}', f'{prefix}id'], descending
+
+    def _after(self, value, pk, descending):
+        # Первое условие задаёт границу диапазона индекса, второе отсекает
+        # уже показанные строки с тем же значением поля.
+        op = 'lt' if descending else 'gt'
+        bound = 'lte' if descending else 'gte'
+        return Q(**{f'{self.field}__{bound}': value}) & (
+            Q(**{f'{self.field}__{op}': value}) |
+            Q(**{self.field: value, f'id__{op}': pk})
+        )
+
+    def _cursor(self, obj, direction):
+        return encode_cursor(getattr(obj, self.field), obj.pk, direction)
+
+    def page(self, cursor=None):
+        value = pk = None
+        direction = NEXT
+        if cursor:
+            try:
+                value, pk, direction = decode_cursor(cursor)
+                value = self._to_python(value)
+            except (ValueError, TypeError, binascii.Error, ValidationError):
+                value = pk = None
+                direction = NEXT
+
+        reverse = direction == PREVIOUS
+        ordering, descending = self._order(reverse=reverse)
+        queryset = self.queryset.order_by(*ordering)
+        if pk is not None:
+            queryset = queryset.filter(self._after(value, pk, descending))
+
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+
+        if reverse:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, pk is not None
+
+        return KeysetPage(
+            rows,
+            self.queryset,
+            next_cursor=self._cursor(rows[-1], NEXT) if rows and has_next else None,
+            previous_cursor=self._cursor(rows[0], PREVIOUS) if rows and has_previous else None,
+        )
+
+
+def paginate(request, queryset, ordering, per_page=24):
+    """Страница по курсору из ?cursor= и строка запроса без курсора для ссылок."""
+    page = KeysetPaginator(queryset, ordering, per_page=per_page).page(
+        request.GET.get('cursor')
+    )
+    query = request.GET.copy()
+    query.pop('cursor', None)
+    return page, query.urlencode()
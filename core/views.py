@@ -1,13 +1,17 @@
 from django.shortcuts import render
 from inventory.models import Category, Equipment
+from rentals.popularity import most_popular
+
+
+HOMEPAGE_POPULAR_LIMIT = 8
 
 
 def index_view(request):
     categories = Category.objects.filter(is_active=True)
-    popular_equipment = Equipment.objects.filter(
-        is_active=True,
-        quantity_available__gt=0
-    ).order_by('-created_at')[:8]
+    popular_equipment = most_popular(
+        HOMEPAGE_POPULAR_LIMIT,
+        Equipment.objects.filter(is_active=True, quantity_total__gt=0)
+    )
     
     context = {
         'categories': categories,
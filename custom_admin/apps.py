@@ -5,3 +5,6 @@ class CustomAdminConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'custom_admin'
     verbose_name = 'Кастомная админ-панель'
+
+    def ready(self):
+        from . import signals  # noqa: F401
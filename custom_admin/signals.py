@@ -0,0 +1,9 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from rentals.models import Rental
+from .stats import invalidate_dashboard
+
+
+@receiver([post_save, post_delete], sender=Rental)
+def rental_changed(sender, **kwargs):
+    invalidate_dashboard()
@@ -0,0 +1,158 @@
+"""
+Статистика для дашборда админ-панели.
+
+Счётчики заказов по статусам считаются одним запросом с условной
+агрегацией, выручка и отчёты за период — по дневным сводкам
+(rentals.rollups). Сводки обновляет команда refresh_rollups по расписанию,
+поэтому выручка дашборда за сегодня считается по самим заказам, а сводки
+используются только для прошедших дней. Весь набор данных дашборда
+кэшируется на короткое время и сбрасывается при изменении заказов, поэтому
+несколько открытых дашбордов не нагружают базу на каждом обновлении.
+"""
+from datetime import datetime, time, timedelta
+from django.core.cache import cache
+from django.db.models import Count, Max, Q, Sum
+from django.utils import timezone
+from accounts.models import User
+from inventory.models import Equipment
+from rentals.availability import date_range, filter_available
+from rentals.models import DailyCategoryUsage, DailyEquipmentUsage, DailyRentalStats, Rental
+from rentals.popularity import most_popular
+
+
+DASHBOARD_CACHE_KEY = 'custom_admin:dashboard'
+DASHBOARD_CACHE_TIMEOUT = 60
+
+DASHBOARD_POPULAR_LIMIT = 5
+
+REVENUE_STATUSES = [Rental.Status.ACTIVE, Rental.Status.COMPLETED]
+
+
+# Сколько позиций показывать в отчёте по загрузке инвентаря
+REPORT_EQUIPMENT_LIMIT = 20
+
+REPORT_DEFAULT_DAYS = 30
+REPORT_MAX_DAYS = 366
+
+
+def rental_stats():
+    """Количество заказов по статусам и всего одним запросом."""
+    aggregates = {
+        f'{value.lower()}_count': Count('id', filter=Q(status=value))
+        for value in Rental.Status.values
+    }
+    aggregates['total_rentals'] = Count('id')
+    return Rental.objects.order_by().aggregate(**aggregates)
+
+
+def revenue_between(start_date, end_date):
+    """Выручка за период: прошедшие дни — по дневным сводкам, сегодня — по
+    заказам (индекс rental_status_created)."""
+    today = timezone.localdate()
+    revenue = DailyRentalStats.objects.filter(
+        day__range=(start_date, min(end_date, today - timedelta(days=1))),
+        status__in=REVENUE_STATUSES,
+    ).aggregate(revenue=Sum('revenue'))['revenue'] or 0
+    if start_date <= today <= end_date:
+        day_start = datetime.combine(today, time.min, tzinfo=timezone.get_current_timezone())
+        revenue += Rental.objects.filter(
+            status__in=REVENUE_STATUSES,
+            created_at__gte=day_start,
+            created_at__lt=day_start + timedelta(days=1),
+        ).aggregate(revenue=Sum('total_price'))['revenue'] or 0
+    return revenue
+
+
+def compute_dashboard():
+    today = timezone.localdate()
+    stats = rental_stats()
+    stats['monthly_revenue'] = revenue_between(today - timedelta(days=29), today)
+    stats['active_rentals'] = stats['active_count']
+    stats['total_users'] = User.objects.filter(role=User.Role.CLIENT).count()
+    stats['available_equipment'] = filter_available(
+        Equipment.objects.filter(is_active=True), today, today,
+    ).count()
+
+    recent_rentals = list(Rental.objects.select_related('user').order_by('-created_at')[:10])
+
+    popular_equipment = list(most_popular(DASHBOARD_POPULAR_LIMIT))
+
+    return {
+        'stats': stats,
+        'recent_rentals': recent_rentals,
+        'popular_equipment': popular_equipment,
+    }
+
+
+def rentals_report(start_date, end_date):
+    """Отчёт за период по дневным сводкам.
+
+    Выручка и заказы по дням, итоги по статусам, единицы в аренде по
+    категориям (единице-дни) и загрузка самого востребованного инвентаря.
+    """
+    days = {
+        day: {'day': day, 'orders': 0, 'revenue': 0}
+        for day in date_range(start_date, end_date)
+    }
+    by_status = {value: {'orders': 0, 'revenue': 0} for value in Rental.Status.values}
+    rows = DailyRentalStats.objects.filter(
+        day__range=(start_date, end_date),
+    ).values_list('day', 'status', 'orders', 'revenue')
+    for day, status, orders, revenue in rows:
+        days[day]['orders'] += orders
+        if status in REVENUE_STATUSES:
+            days[day]['revenue'] += revenue
+        by_status[status]['orders'] += orders
+        by_status[status]['revenue'] += revenue
+
+    daily = list(days.values())
+    max_revenue = max((row['revenue'] for row in daily), default=0)
+    for row in daily:
+        row['percent'] = round(row['revenue'] * 100 / max_revenue) if max_revenue else 0
+
+    categories = list(
+        DailyCategoryUsage.objects.filter(
+            day__range=(start_date, end_date),
+        ).values('category_id', 'category__name').annotate(
+            unit_days=Sum('units'),
+        ).order_by('-unit_days')
+    )
+    max_units = max((row['unit_days'] for row in categories), default=0)
+    for row in categories:
+        row['percent'] = round(row['unit_days'] * 100 / max_units) if max_units else 0
+
+    period_days = len(daily)
+    equipment = list(
+        DailyEquipmentUsage.objects.filter(
+            day__range=(start_date, end_date),
+        ).values('equipment_id', 'equipment__name').annotate(
+            unit_days=Sum('units'),
+            capacity=Max('capacity'),
+        ).order_by('-unit_days')[:REPORT_EQUIPMENT_LIMIT]
+    )
+    for row in equipment:
+        available = row['capacity'] * period_days
+        row['utilization'] = round(row['unit_days'] * 100 / available) if available else 0
+
+    return {
+        'daily': daily,
+        'by_status': [
+            (value, label, by_status[value]) for value, label in Rental.Status.choices
+        ],
+        'total_orders': sum(row['orders'] for row in daily),
+        'total_revenue': sum(row['revenue'] for row in daily),
+        'categories': categories,
+        'equipment': equipment,
+    }
+
+
+def get_dashboard():
+    dashboard = cache.get(DASHBOARD_CACHE_KEY)
+    if dashboard is None:
+        dashboard = compute_dashboard()
+        cache.set(DASHBOARD_CACHE_KEY, dashboard, DASHBOARD_CACHE_TIMEOUT)
+    return dashboard
+
+
+def invalidate_dashboard():
+    cache.delete(DASHBOARD_CACHE_KEY)
@@ -5,6 +5,7 @@ app_name = 'custom_admin'
 
 urlpatterns = [
     path('', views.dashboard_view, name='dashboard'),
+    path('reports/', views.reports_view, name='reports'),
 
     path('categories/', views.categories_list_view, name='categories_list'),
     path('categories/create/', views.category_create_view, name='category_create'),
@@ -21,6 +22,8 @@ urlpatterns = [
     path('users/<int:pk>/delete/', views.user_delete_view, name='user_delete'),
     
     path('rentals/', views.rentals_list_view, name='rentals_list'),
+    path('rentals/bulk-status/', views.rentals_bulk_status_view, name='rentals_bulk_status'),
+    path('rentals/export/<str:export_format>/', views.rentals_export_view, name='rentals_export'),
     path('rentals/<int:pk>/', views.rental_detail_view, name='rental_detail'),
     path('rentals/<int:pk>/update-status/', views.rental_update_status_view, name='rental_update_status'),
 ]
\ No newline at end of file
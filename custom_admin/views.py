@@ -1,98 +1,109 @@
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.db.models import Count, Sum, Q
+from django.db.models import Q
 from django.utils import timezone
-from datetime import timedelta
+from datetime import date, timedelta
 from .decorators import admin_required, staff_required
+from .stats import REPORT_DEFAULT_DAYS, REPORT_MAX_DAYS, get_dashboard, rentals_report
 from accounts.models import User
 from inventory.models import Category, Equipment
-from rentals.models import Rental, RentalItem
+from inventory.search import search_equipment
+from core.pagination import paginate
+from rentals.models import Rental
+from rentals.export import EXPORT_FORMATS, export_filename, stream_export
+from rentals.search import RENTALS_ORDERING, filter_rentals
+from rentals.status import TransitionError, allowed_transitions, transition_rental, transition_rentals
+from rentals.utils import get_rental_detail
+
+
+ADMIN_RENTALS_PAGE_SIZE = 25
+
 
 @staff_required
 def dashboard_view(request):
     
-
-    stats = {
-        'total_users': User.objects.filter(role='CLIENT').count(),
-        'active_rentals': Rental.objects.filter(status='ACTIVE').count(),
-        'available_equipment': Equipment.objects.filter(
-            is_active=True, 
-            quantity_available__gt=0
-        ).count(),
-    }
+    context = get_dashboard()
     
+    return render(request, 'custom_admin/dashboard.html', context)
 
-    month_ago = timezone.now() - timedelta(days=30)
-    monthly_revenue = Rental.objects.filter(
-        created_at__gte=month_ago,
-        status__in=['ACTIVE', 'COMPLETED']
-    ).aggregate(total=Sum('total_price'))['total'] or 0
-    stats['monthly_revenue'] = monthly_revenue
-    
+def _parse_date(value, default):
+    try:
+        return date.fromisoformat(value) if value else default
+    except ValueError:
+        return default
 
-    stats['pending_count'] = Rental.objects.filter(status='PENDING').count()
-    stats['confirmed_count'] = Rental.objects.filter(status='CONFIRMED').count()
-    stats['active_count'] = Rental.objects.filter(status='ACTIVE').count()
-    stats['completed_count'] = Rental.objects.filter(status='COMPLETED').count()
-    stats['cancelled_count'] = Rental.objects.filter(status='CANCELLED').count()
-    stats['total_rentals'] = Rental.objects.count()
-    
 
-    recent_rentals = Rental.objects.select_related('user').order_by('-created_at')[:10]
+@staff_required
+def reports_view(request):
     
-
-    popular_equipment = RentalItem.objects.values(
-        'equipment__name', 
-        'equipment__price_per_day'
-    ).annotate(
-        rental_count=Count('id')
-    ).order_by('-rental_count')[:5]
+    today = timezone.localdate()
+    date_to = _parse_date(request.GET.get('date_to'), today)
+    date_from = _parse_date(
+        request.GET.get('date_from'),
+        date_to - timedelta(days=REPORT_DEFAULT_DAYS - 1)
+    )
+    if date_from > date_to:
+        date_from, date_to = date_to, date_from
+    if (date_to - date_from).days >= REPORT_MAX_DAYS:
+        date_from = date_to - timedelta(days=REPORT_MAX_DAYS - 1)
+        messages.info(request, f'Период отчёта ограничен {REPORT_MAX_DAYS} днями')
     
-    context = {
-        'stats': stats,
-        'recent_rentals': recent_rentals,
-        'popular_equipment': popular_equipment,
-    }
+    context = rentals_report(date_from, date_to)
+    context.update({
+        'date_from': date_from,
+        'date_to': date_to,
+    })
     
-    return render(request, 'custom_admin/dashboard.html', context)
+    return render(request, 'custom_admin/reports.html', context)
+
 
 @staff_required
 def rentals_list_view(request):
     
-    rentals = Rental.objects.select_related('user').order_by('-created_at')
-    
-
-    status_filter = request.GET.get('status')
-    if status_filter:
-        rentals = rentals.filter(status=status_filter)
-    
-    search_query = request.GET.get('search')
-    if search_query:
-        rentals = rentals.filter(
-            Q(id__icontains=search_query) |
-            Q(user__username__icontains=search_query) |
-            Q(user__email__icontains=search_query)
-        )
+    rentals, filters = filter_rentals(Rental.objects.select_related('user'), request.GET)
+    page, pagination_query = paginate(
+        request, rentals, RENTALS_ORDERING, per_page=ADMIN_RENTALS_PAGE_SIZE
+    )
     
     context = {
-        'rentals': rentals,
+        'rentals': page,
+        'page': page,
+        'pagination_query': pagination_query,
         'status_choices': Rental.Status.choices,
-        'status_filter': status_filter,
-        'search_query': search_query,
+        **filters,
     }
     
     return render(request, 'custom_admin/rentals/list.html', context)
 
 
+@staff_required
+def rentals_export_view(request, export_format):
+    
+    if export_format not in EXPORT_FORMATS:
+        raise Http404
+    
+    rentals, _ = filter_rentals(Rental.objects.all(), request.GET)
+    content_type, _ = EXPORT_FORMATS[export_format]
+    
+    response = StreamingHttpResponse(
+        stream_export(rentals, export_format),
+        content_type=content_type
+    )
+    response['Content-Disposition'] = f'attachment; filename="{export_filename(export_format)}"'
+    return response
+
+
 @staff_required
 def rental_detail_view(request, pk):
     
-    rental = get_object_or_404(Rental.objects.select_related('user'), id=pk)
-    rental_items = rental.items.select_related('equipment')
+    rental = get_rental_detail(id=pk)
+    rental_items = rental.items.all()
     
     context = {
         'rental': rental,
         'rental_items': rental_items,
+        'allowed_statuses': allowed_transitions(rental),
     }
     
     return render(request, 'custom_admin/rentals/detail.html', context)
@@ -106,32 +117,50 @@ def rental_update_status_view(request, pk):
     if request.method == 'POST':
         new_status = request.POST.get('status')
         
-        if new_status in dict(Rental.Status.choices):
-            old_status = rental.status
-            rental.status = new_status
-            
-            if new_status == 'CONFIRMED' and old_status == 'PENDING':
-                rental.confirmed_by = request.user
-                rental.confirmed_at = timezone.now()
-            
-            rental.save()
-            
+        try:
+            transition_rental(rental, new_status, user=request.user)
             messages.success(
                 request, 
                 f'Статус заказа №{rental.id} изменён: {rental.get_status_display()}'
             )
-        else:
-            messages.error(request, 'Неверный статус')
+        except TransitionError as error:
+            messages.error(request, str(error))
     
     return redirect('custom_admin:rental_detail', pk=pk)
 
 
+@staff_required
+def rentals_bulk_status_view(request):
+    
+    if request.method == 'POST':
+        rental_ids = [int(pk) for pk in request.POST.getlist('rental_ids') if pk.isdigit()]
+        new_status = request.POST.get('status')
+        
+        if not rental_ids:
+            messages.warning(request, 'Не выбрано ни одного заказа')
+        else:
+            try:
+                changed, skipped = transition_rentals(rental_ids, new_status, user=request.user)
+                if changed:
+                    messages.success(
+                        request,
+                        f'Статус изменён у {len(changed)} заказов: {Rental.Status(new_status).label}'
+                    )
+                if skipped:
+                    messages.warning(
+                        request,
+                        'Переход недопустим для заказов: ' + ', '.join(f'№{pk}' for pk in skipped)
+                    )
+            except TransitionError as error:
+                messages.error(request, str(error))
+    
+    return redirect('custom_admin:rentals_list')
+
+
 @admin_required
 def categories_list_view(request):
     
-    categories = Category.objects.annotate(
-        equipment_count=Count('equipment')
-    ).order_by('name')
+    categories = Category.objects.order_by('name')
     
     context = {
         'categories': categories,
@@ -234,11 +263,7 @@ def equipment_list_view(request):
     
     search_query = request.GET.get('search')
     if search_query:
-        equipment_list = equipment_list.filter(
-            Q(name__icontains=search_query) |
-            Q(brand__icontains=search_query) |
-            Q(description__icontains=search_query)
-        )
+        equipment_list = search_equipment(equipment_list, search_query).order_by('-rank', '-created_at')
     
     categories = Category.objects.filter(is_active=True)
     
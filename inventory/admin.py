@@ -1,6 +1,6 @@
 from django.contrib import admin
 from unfold.admin import ModelAdmin
-from .models import Category, Equipment
+from .models import Category, Equipment, StockMovement, StockSnapshot
 
 
 @admin.register(Category)
@@ -55,4 +55,35 @@ class EquipmentAdmin(ModelAdmin):
     def get_readonly_fields(self, request, obj=None):
         if obj:
             return ['slug', 'created_at', 'updated_at']
-        return ['created_at', 'updated_at']
\ No newline at end of file
+        return ['created_at', 'updated_at']
+
+
+@admin.register(StockMovement)
+class StockMovementAdmin(ModelAdmin):
+    list_display = ['equipment', 'kind', 'quantity', 'comment', 'created_by', 'created_at']
+    list_filter = ['kind', 'created_at']
+    search_fields = ['equipment__name', 'comment']
+    list_select_related = ['equipment', 'created_by']
+    
+    # Журнал только дополняется
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(StockSnapshot)
+class StockSnapshotAdmin(ModelAdmin):
+    list_display = ['equipment', 'quantity', 'last_movement_id', 'created_at']
+    search_fields = ['equipment__name']
+    list_select_related = ['equipment']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
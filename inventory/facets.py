@@ -0,0 +1,110 @@
+"""
+Счётчики фасетов для боковой панели каталога.
+
+Все счётчики (категории, состояние, ценовые диапазоны, доступность на даты) считаются
+одним запросом с условной агрегацией по уже отфильтрованному queryset и
+кэшируются по нормализованному набору фильтров.
+"""
+import hashlib
+from decimal import Decimal
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.db.models.expressions import RawSQL
+from .models import Equipment
+
+
+FACETS_CACHE_TIMEOUT = 60
+
+# (ключ, подпись, нижняя граница включительно, верхняя граница не включительно)
+PRICE_BUCKETS = [
+    ('lt500', 'до 500 ₽', None, 500),
+    ('500_1000', '500 – 1000 ₽', 500, 1000),
+    ('1000_1500', '1000 – 1500 ₽', 1000, 1500),
+    ('gte1500', 'от 1500 ₽', 1500, None),
+]
+
+# Параметры запроса, которые не влияют на набор товаров
+IGNORED_PARAMS = {'sort', 'cursor'}
+
+
+def filter_signature(params):
+    items = sorted(
+        (key, value)
+        for key in params
+        if key not in IGNORED_PARAMS
+        for value in params.getlist(key)
+        if value
+    )
+    return hashlib.md5(repr(items).encode()).hexdigest()
+
+
+def _price_q(low, high):
+    q = Q()
+    if low is not None:
+        q &= Q(price_per_day__gte=low)
+    if high is not None:
+        q &= Q(price_per_day__lt=high)
+    return q
+
+
+def _count_facets(queryset, categories, period):
+    aggregates = {
+        f'category_{category.id}': Count('id', filter=Q(category_id=category.id))
+        for category in categories
+    }
+    aggregates.update({
+        f'condition_{value}': Count('id', filter=Q(condition=value))
+        for value, label in Equipment.Condition.choices
+    })
+    aggregates.update({
+        f'price_{key}': Count('id', filter=_price_q(low, high))
+        for key, label, low, high in PRICE_BUCKETS
+    })
+    from rentals.availability import overbooked_sql
+    sql, params = overbooked_sql(queryset, *period)
+    available = Q(quantity_total__gt=0) & ~Q(id__in=RawSQL(sql, params))
+    aggregates['available'] = Count('id', filter=available)
+    aggregates['unavailable'] = Count('id', filter=~available)
+    return queryset.order_by().aggregate(**aggregates)
+
+
+def catalog_facets(queryset, categories, params, period):
+    """Счётчики фасетов для отфильтрованного `queryset`.
+
+    `params` — QueryDict с фильтрами каталога; он же используется как ключ
+    кэша и для ссылок на ценовые диапазоны. `period` — (начало, конец),
+    на который считается доступность.
+    """
+    categories = list(categories)
+    cache_key = 'catalog_facets:' + filter_signature(params)
+    counts = cache.get(cache_key)
+    if counts is None:
+        counts = _count_facets(queryset, categories, period)
+        cache.set(cache_key, counts, FACETS_CACHE_TIMEOUT)
+
+    price = []
+    for key, label, low, high in PRICE_BUCKETS:
+        query = params.copy()
+        query.pop('cursor', None)
+        query['min_price'] = low if low is not None else ''
+        # Фильтр каталога по max_price включительный, а верхняя граница
+        # диапазона — нет
+        query['max_price'] = high - Decimal('0.01') if high is not None else ''
+        price.append({
+            'label': label,
+            'count': counts.get(f'price_{key}', 0),
+            'query': query.urlencode(),
+        })
+
+    return {
+        'categories': [
+            (category, counts.get(f'category_{category.id}', 0)) for category in categories
+        ],
+        'conditions': [
+            (value, label, counts.get(f'condition_{value}', 0))
+            for value, label in Equipment.Condition.choices
+        ],
+        'price': price,
+        'available': counts.get('available', 0),
+        'unavailable': counts.get('unavailable', 0),
+    }
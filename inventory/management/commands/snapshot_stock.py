@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from inventory.stock import take_snapshots
+
+
+class Command(BaseCommand):
+    help = 'Сохраняет снимки остатков по журналу движений (запускать по расписанию)'
+
+    def handle(self, *args, **kwargs):
+        created = take_snapshots()
+        self.stdout.write(self.style.SUCCESS(f'Создано снимков: {created}'))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from inventory.stock import stock_ledger_drift
+
+
+class Command(BaseCommand):
+    help = 'Показывает инвентарь, остаток которого расходится с журналом движений'
+
+    def handle(self, *args, **kwargs):
+        rows = list(stock_ledger_drift().values_list(
+            'id', 'name', 'quantity_available', 'ledger_quantity'
+        ))
+        if rows:
+            header = f'{"ID":>8}  {"Название":<40} {"Доступно":>8} {"По журналу":>10}'
+            self.stdout.write(header)
+            self.stdout.write('-' * len(header))
+            for equipment_id, name, available, ledger in rows:
+                self.stdout.write(f'{equipment_id:>8}  {name[:40]:<40} {available:>8} {ledger:>10}')
+        self.stdout.write(self.style.SUCCESS(f'Расхождений: {len(rows)}'))
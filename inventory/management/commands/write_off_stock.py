@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from inventory.models import Equipment
+from inventory.stock import write_off_stock
+
+
+class Command(BaseCommand):
+    help = 'Списывает единицы инвентаря (поломка, утеря) из парка и доступного остатка'
+
+    def add_arguments(self, parser):
+        parser.add_argument('equipment_id', type=int, help='ID инвентаря')
+        parser.add_argument('quantity', type=int, help='Сколько единиц списать')
+        parser.add_argument('--comment', default='', help='Причина списания')
+
+    def handle(self, *args, **options):
+        if options['quantity'] < 1:
+            raise CommandError('Количество должно быть не меньше 1')
+        try:
+            equipment = Equipment.objects.get(pk=options['equipment_id'])
+        except Equipment.DoesNotExist:
+            raise CommandError(f"Инвентарь с ID {options['equipment_id']} не найден")
+
+        applied = write_off_stock(equipment, options['quantity'], comment=options['comment'])
+        equipment.refresh_from_db(fields=['quantity_total', 'quantity_available'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{equipment}: списано из остатка {-applied.get(equipment.pk, 0)} шт., '
+            f'в парке {equipment.quantity_total}, доступно {equipment.quantity_available}'
+        ))
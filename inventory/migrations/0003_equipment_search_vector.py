@@ -0,0 +1,53 @@
+# Generated by Django 5.0.1 on 2026-10-18 10:57
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+SEARCH_VECTOR_SQL = """
+    setweight(to_tsvector('russian', coalesce({row}.name, '')), 'A') ||
+    setweight(to_tsvector('russian', coalesce({row}.brand, '')), 'B') ||
+    setweight(to_tsvector('russian', coalesce({row}.model, '')), 'B') ||
+    setweight(to_tsvector('russian', coalesce({row}.description, '')), 'C')
+"""
+
+CREATE_TRIGGER_SQL = f"""
+CREATE FUNCTION inventory_equipment_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := {SEARCH_VECTOR_SQL.format(row='NEW')};
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER inventory_equipment_search_vector_trigger
+    BEFORE INSERT OR UPDATE ON inventory_equipment
+    FOR EACH ROW EXECUTE FUNCTION inventory_equipment_search_vector_update();
+
+UPDATE inventory_equipment SET search_vector = {SEARCH_VECTOR_SQL.format(row='inventory_equipment')};
+"""
+
+DROP_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS inventory_equipment_search_vector_trigger ON inventory_equipment;
+DROP FUNCTION IF EXISTS inventory_equipment_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_equipment_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipment',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.AddIndex(
+            model_name='equipment',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='equipment_search_vector'),
+        ),
+        migrations.RunSQL(CREATE_TRIGGER_SQL, DROP_TRIGGER_SQL),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.1 on 2026-10-18 11:00
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_active_equipment(apps, schema_editor):
+    Category = apps.get_model('inventory', 'Category')
+    Equipment = apps.get_model('inventory', 'Equipment')
+    active = Equipment.objects.filter(
+        category_id=OuterRef('pk'),
+        is_active=True,
+    ).order_by().values('category_id').annotate(total=Count('id')).values('total')
+    Category.objects.update(
+        equipment_count=Coalesce(Subquery(active, output_field=IntegerField()), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0004_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='equipment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Активных товаров'),
+        ),
+        migrations.RunPython(count_active_equipment, migrations.RunPython.noop),
+    ]
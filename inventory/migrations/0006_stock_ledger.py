@@ -0,0 +1,57 @@
+# Generated by Django 5.0.1 on 2026-10-18 11:09
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_category_equipment_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('CHECKOUT', 'Выдача по заказу'), ('RETURN', 'Возврат по заказу'), ('ADJUST', 'Ручная корректировка'), ('WRITE_OFF', 'Списание')], max_length=20, verbose_name='Тип')),
+                ('quantity', models.IntegerField(verbose_name='Изменение, шт.')),
+                ('comment', models.CharField(blank=True, max_length=255, verbose_name='Комментарий')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('equipment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to='inventory.equipment', verbose_name='Инвентарь')),
+            ],
+            options={
+                'verbose_name': 'Движение остатков',
+                'verbose_name_plural': 'Движения остатков',
+                'ordering': ['-id'],
+                'indexes': [models.Index(fields=['equipment', 'id'], name='stockmovement_equipment_id')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.IntegerField(verbose_name='Остаток, шт.')),
+                ('last_movement_id', models.BigIntegerField(default=0, verbose_name='Последняя учтённая запись журнала')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата')),
+                ('equipment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_snapshots', to='inventory.equipment', verbose_name='Инвентарь')),
+            ],
+            options={
+                'verbose_name': 'Снимок остатков',
+                'verbose_name_plural': 'Снимки остатков',
+                'ordering': ['-id'],
+                'indexes': [models.Index(fields=['equipment', '-id'], name='stocksnapshot_equipment_id')],
+            },
+        ),
+        migrations.RunSQL(
+            """
+            INSERT INTO inventory_stocksnapshot (equipment_id, quantity, last_movement_id, created_at)
+            SELECT id, quantity_available, 0, NOW() FROM inventory_equipment
+            """,
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations
+
+
+# Вектор зависит только от текстовых полей; без списка колонок триггер
+# пересчитывал его при каждом UPDATE остатков
+RECREATE_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS inventory_equipment_search_vector_trigger ON inventory_equipment;
+CREATE TRIGGER inventory_equipment_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF name, brand, model, description ON inventory_equipment
+    FOR EACH ROW EXECUTE FUNCTION inventory_equipment_search_vector_update();
+"""
+
+RESTORE_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS inventory_equipment_search_vector_trigger ON inventory_equipment;
+CREATE TRIGGER inventory_equipment_search_vector_trigger
+    BEFORE INSERT OR UPDATE ON inventory_equipment
+    FOR EACH ROW EXECUTE FUNCTION inventory_equipment_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0006_stock_ledger'),
+    ]
+
+    operations = [
+        migrations.RunSQL(RECREATE_TRIGGER_SQL, RESTORE_TRIGGER_SQL),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.1 on 2026-10-18 11:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0007_search_trigger_text_columns'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipment',
+            name='popularity',
+            field=models.FloatField(default=0, editable=False, verbose_name='Популярность'),
+        ),
+        migrations.AddField(
+            model_name='equipment',
+            name='rental_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Аренд за год'),
+        ),
+        migrations.AddIndex(
+            model_name='equipment',
+            index=models.Index(fields=['popularity', 'id'], name='equipment_popularity_id'),
+        ),
+    ]
@@ -1,4 +1,7 @@
+from django.conf import settings
 from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.utils.text import slugify
 from django.core.validators import MinValueValidator, MaxValueValidator
 
@@ -33,6 +36,12 @@ class Category(models.Model):
         verbose_name='Активна'
     )
     
+    equipment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Активных товаров'
+    )
+    
     created_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name='Дата создания'
@@ -42,6 +51,9 @@ class Category(models.Model):
         verbose_name = 'Категория'
         verbose_name_plural = 'Категории'
         ordering = ['name']
+        indexes = [
+            GinIndex(fields=['name'], name='category_name_trgm', opclasses=['gin_trgm_ops']),
+        ]
     
     def __str__(self):
         return self.name
@@ -143,10 +155,42 @@ class Equipment(models.Model):
         verbose_name='Дата обновления'
     )
     
+    # Пересчитываются командой update_popularity (rentals.popularity)
+    popularity = models.FloatField(
+        default=0,
+        editable=False,
+        verbose_name='Популярность'
+    )
+    
+    rental_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Аренд за год'
+    )
+    
+    # Заполняется триггером БД из name, brand, model и description
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        verbose_name='Поисковый вектор'
+    )
+    
     class Meta:
         verbose_name = 'Инвентарь'
         verbose_name_plural = 'Инвентарь'
         ordering = ['-created_at']
+        indexes = [
+            # Курсорная пагинация каталога: поле сортировки + id
+            models.Index(fields=['created_at', 'id'], name='equipment_created_id'),
+            models.Index(fields=['price_per_day', 'id'], name='equipment_price_id'),
+            models.Index(fields=['name', 'id'], name='equipment_name_id'),
+            models.Index(fields=['popularity', 'id'], name='equipment_popularity_id'),
+            GinIndex(fields=['search_vector'], name='equipment_search_vector'),
+            # Нечёткий поиск для автодополнения (pg_trgm)
+            GinIndex(fields=['name'], name='equipment_name_trgm', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['brand'], name='equipment_brand_trgm', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['model'], name='equipment_model_trgm', opclasses=['gin_trgm_ops']),
+        ]
     
     def __str__(self):
         return f"{self.name} ({self.size})"
@@ -158,4 +202,98 @@ class Equipment(models.Model):
     
     @property
     def is_available(self):
-        return self.is_active and self.quantity_available > 0
\ No newline at end of file
+        return self.is_active and self.quantity_total > 0
+
+
+class StockMovement(models.Model):
+    """Запись журнала движения остатков (только добавление)."""
+    
+    class Kind(models.TextChoices):
+        CHECKOUT = 'CHECKOUT', 'Выдача по заказу'
+        RETURN = 'RETURN', 'Возврат по заказу'
+        ADJUST = 'ADJUST', 'Ручная корректировка'
+        WRITE_OFF = 'WRITE_OFF', 'Списание'
+    
+    equipment = models.ForeignKey(
+        Equipment,
+        on_delete=models.CASCADE,
+        related_name='stock_movements',
+        verbose_name='Инвентарь'
+    )
+    
+    kind = models.CharField(
+        max_length=20,
+        choices=Kind.choices,
+        verbose_name='Тип'
+    )
+    
+    quantity = models.IntegerField(
+        verbose_name='Изменение, шт.'
+    )
+    
+    comment = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name='Комментарий'
+    )
+    
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='stock_movements',
+        verbose_name='Автор'
+    )
+    
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата'
+    )
+    
+    class Meta:
+        verbose_name = 'Движение остатков'
+        verbose_name_plural = 'Движения остатков'
+        ordering = ['-id']
+        indexes = [
+            models.Index(fields=['equipment', 'id'], name='stockmovement_equipment_id'),
+        ]
+    
+    def __str__(self):
+        return f"{self.equipment.name}: {self.quantity:+d} ({self.get_kind_display()})"
+
+
+class StockSnapshot(models.Model):
+    """Остаток инвентаря на момент последней учтённой записи журнала."""
+    
+    equipment = models.ForeignKey(
+        Equipment,
+        on_delete=models.CASCADE,
+        related_name='stock_snapshots',
+        verbose_name='Инвентарь'
+    )
+    
+    quantity = models.IntegerField(
+        verbose_name='Остаток, шт.'
+    )
+    
+    last_movement_id = models.BigIntegerField(
+        default=0,
+        verbose_name='Последняя учтённая запись журнала'
+    )
+    
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата'
+    )
+    
+    class Meta:
+        verbose_name = 'Снимок остатков'
+        verbose_name_plural = 'Снимки остатков'
+        ordering = ['-id']
+        indexes = [
+            models.Index(fields=['equipment', '-id'], name='stocksnapshot_equipment_id'),
+        ]
+    
+    def __str__(self):
+        return f"{self.equipment.name}: {self.quantity} шт."
@@ -0,0 +1,111 @@
+"""
+Поиск по инвентарю.
+
+Полнотекстовый поиск использует Equipment.search_vector, который
+поддерживается триггером БД (конфигурация 'russian'; веса: название — A,
+бренд и модель — B, описание — C). Каждое слово запроса ищется как префикс
+основы, поэтому «лыжи» находит и «лыжный».
+
+Автодополнение использует триграммы (pg_trgm) по названию, бренду и модели
+инвентаря и названию категории, поэтому терпимо к опечаткам.
+"""
+import hashlib
+import re
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, TrigramWordSimilarity,
+)
+from django.core.cache import cache
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import Cast, Greatest
+from django.urls import reverse
+from .models import Category, Equipment
+
+
+SEARCH_CONFIG = 'russian'
+
+AUTOCOMPLETE_LIMIT = 8
+AUTOCOMPLETE_MIN_LENGTH = 2
+AUTOCOMPLETE_MAX_LENGTH = 50
+AUTOCOMPLETE_CACHE_TIMEOUT = 60
+
+
+def build_search_query(text):
+    words = re.findall(r'\w+', text)
+    if not words:
+        return None
+    return SearchQuery(
+        ' & '.join(f'{word}:*' for word in words),
+        config=SEARCH_CONFIG,
+        search_type='raw',
+    )
+
+
+def search_equipment(queryset, text):
+    """Фильтрует инвентарь по запросу и добавляет релевантность `rank`."""
+    query = build_search_query(text)
+    if query is None:
+        return queryset.annotate(rank=Value(0.0, output_field=FloatField())).none()
+    # float8, чтобы значение ранга без потерь возвращалось в курсор пагинации
+    return queryset.filter(search_vector=query).annotate(
+        rank=Cast(SearchRank(F('search_vector'), query), FloatField()),
+    )
+
+
+def normalize_autocomplete_query(text):
+    return ' '.join(text.lower().split())[:AUTOCOMPLETE_MAX_LENGTH]
+
+
+def autocomplete(text, limit=AUTOCOMPLETE_LIMIT):
+    """Подсказки для строки поиска: список словарей type/label/url.
+
+    Результат кэшируется на короткое время по нормализованной строке,
+    чтобы частые префиксы не доходили до базы данных.
+    """
+    query = normalize_autocomplete_query(text)
+    if len(query) < AUTOCOMPLETE_MIN_LENGTH:
+        return []
+
+    cache_key = 'autocomplete:' + hashlib.md5(query.encode()).hexdigest()
+    suggestions = cache.get(cache_key)
+    if suggestions is not None:
+        return suggestions
+
+    categories = Category.objects.filter(
+        is_active=True,
+        name__trigram_word_similar=query,
+    ).annotate(
+        similarity=TrigramWordSimilarity(query, 'name'),
+    ).order_by('-similarity').values('name', 'slug')[:2]
+
+    equipment = Equipment.objects.filter(
+        Q(name__trigram_word_similar=query) |
+        Q(brand__trigram_word_similar=query) |
+        Q(model__trigram_word_similar=query),
+        is_active=True,
+    ).annotate(
+        similarity=Greatest(
+            TrigramWordSimilarity(query, 'name'),
+            TrigramWordSimilarity(query, 'brand'),
+            TrigramWordSimilarity(query, 'model'),
+        ),
+    ).order_by('-similarity', 'name').values('name', 'slug', 'size')[:limit]
+
+    suggestions = [
+        {
+            'type': 'category',
+            'label': category['name'],
+            'url': reverse('inventory:category', args=[category['slug']]),
+        }
+        for category in categories
+    ] + [
+        {
+            'type': 'equipment',
+            'label': f"{item['name']} ({item['size']})",
+            'url': reverse('inventory:equipment_detail', args=[item['slug']]),
+        }
+        for item in equipment
+    ]
+    suggestions = suggestions[:limit]
+
+    cache.set(cache_key, suggestions, AUTOCOMPLETE_CACHE_TIMEOUT)
+    return suggestions
@@ -0,0 +1,73 @@
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_init, pre_save, post_save, post_delete
+from django.dispatch import receiver
+from .models import Category, Equipment, StockMovement
+from .stock import record_movements
+
+
+def update_equipment_counts(category_ids=None):
+    """Пересчитывает Category.equipment_count одним UPDATE.
+
+    Без аргументов пересчитываются все категории — это нужно после массовых
+    изменений через QuerySet.update(), которые не вызывают сигналы.
+    """
+    active = Equipment.objects.filter(
+        category_id=OuterRef('pk'),
+        is_active=True,
+    ).order_by().values('category_id').annotate(total=Count('id')).values('total')
+
+    categories = Category.objects.all()
+    if category_ids is not None:
+        categories = categories.filter(pk__in={pk for pk in category_ids if pk})
+    categories.update(
+        equipment_count=Coalesce(Subquery(active, output_field=IntegerField()), 0)
+    )
+
+
+@receiver(post_init, sender=Equipment)
+def remember_equipment_state(sender, instance, **kwargs):
+    # Читаем из __dict__, чтобы не загружать отложенные (.only/.defer) поля
+    instance._counted_state = (
+        instance.__dict__.get('category_id'),
+        instance.__dict__.get('is_active'),
+    )
+
+
+@receiver(post_save, sender=Equipment)
+def equipment_saved(sender, instance, created, **kwargs):
+    previous_category_id, was_active = instance._counted_state
+    state = (instance.category_id, instance.is_active)
+    if created or state != (previous_category_id, was_active):
+        update_equipment_counts({previous_category_id, instance.category_id})
+    instance._counted_state = state
+
+
+@receiver(pre_save, sender=Equipment)
+def remember_stored_stock(sender, instance, **kwargs):
+    # Остаток читаем из базы: объект в памяти мог устареть после UPDATE
+    # при оформлении или возврате заказа
+    instance._stored_stock = None
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and 'quantity_available' not in update_fields:
+        return
+    if instance.pk:
+        instance._stored_stock = Equipment.objects.filter(pk=instance.pk).values_list(
+            'quantity_available', flat=True
+        ).first()
+
+
+@receiver(post_save, sender=Equipment)
+def record_stock_adjustment(sender, instance, created, **kwargs):
+    # Изменения остатка через save() (формы админки, сидер) попадают в журнал
+    # как корректировки; выдачи и возвраты пишут журнал сами
+    quantity = int(instance.quantity_available)
+    if created:
+        record_movements({instance.pk: quantity}, StockMovement.Kind.ADJUST, comment='Начальный остаток')
+    elif instance._stored_stock is not None and quantity != instance._stored_stock:
+        record_movements({instance.pk: quantity - instance._stored_stock}, StockMovement.Kind.ADJUST)
+
+
+@receiver(post_delete, sender=Equipment)
+def equipment_deleted(sender, instance, **kwargs):
+    update_equipment_counts([instance.category_id])
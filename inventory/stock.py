@@ -0,0 +1,141 @@
+"""
+Журнал движения остатков.
+
+Каждое изменение `Equipment.quantity_available` дополнительно записывается
+в журнал StockMovement (только добавление). Периодические снимки
+StockSnapshot фиксируют остаток и id последней учтённой записи, поэтому
+остаток по журналу — это последний снимок плюс сумма более поздних записей,
+без пересчёта всей истории. Расхождение с quantity_available показывает
+изменения в обход журнала; его выводит stock_ledger_drift() и команда
+stock_ledger_drift.
+"""
+from django.db import connection
+from django.db.models import F, Max, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from .models import Equipment, StockMovement, StockSnapshot
+
+
+def record_movements(quantities, kind, user=None, comment=''):
+    """Пишет движения одним INSERT: `quantities` — {equipment_id: изменение}."""
+    StockMovement.objects.bulk_create([
+        StockMovement(
+            equipment_id=equipment_id,
+            kind=kind,
+            quantity=quantity,
+            created_by=user,
+            comment=comment,
+        )
+        for equipment_id, quantity in quantities.items()
+        if quantity
+    ])
+
+
+def with_ledger_stock(queryset):
+    """Добавляет к queryset инвентаря остаток по журналу.
+
+    `ledger_quantity` — последний снимок плюс более поздние движения,
+    `ledger_movement_id` — id последнего учтённого движения.
+    """
+    snapshots = StockSnapshot.objects.filter(equipment_id=OuterRef('pk')).order_by('-id')
+    movements = StockMovement.objects.filter(
+        equipment_id=OuterRef('pk'),
+        id__gt=OuterRef('snapshot_movement_id'),
+    ).order_by().values('equipment_id')
+
+    return queryset.annotate(
+        snapshot_quantity=Coalesce(Subquery(snapshots.values('quantity')[:1]), Value(0)),
+        snapshot_movement_id=Coalesce(Subquery(snapshots.values('last_movement_id')[:1]), Value(0)),
+    ).annotate(
+        ledger_quantity=F('snapshot_quantity') + Coalesce(
+            Subquery(movements.annotate(total=Sum('quantity')).values('total')), Value(0)
+        ),
+        ledger_movement_id=Coalesce(
+            Subquery(movements.annotate(last=Max('id')).values('last')), F('snapshot_movement_id')
+        ),
+    )
+
+
+def stock_ledger_drift():
+    """Инвентарь, у которого quantity_available расходится с остатком по журналу.
+
+    Аннотации — как у with_ledger_stock().
+    """
+    return with_ledger_stock(Equipment.objects.all()).exclude(
+        quantity_available=F('ledger_quantity'),
+    ).order_by('id')
+
+
+def take_snapshots():
+    """Снимки остатков по инвентарю с новыми движениями одним INSERT ... SELECT."""
+    stock = with_ledger_stock(Equipment.objects.all()).filter(
+        ledger_movement_id__gt=F('snapshot_movement_id'),
+    ).values_list('id', 'ledger_quantity', 'ledger_movement_id')
+    sql, params = stock.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {StockSnapshot._meta.db_table}
+                (equipment_id, quantity, last_movement_id, created_at)
+            SELECT stock.id, stock.quantity, stock.last_movement_id, NOW()
+            FROM ({sql}) AS stock (id, quantity, last_movement_id)
+            """,
+            params,
+        )
+        return cursor.rowcount
+
+
+def change_stock(quantities, kind, user=None, comment='', fleet=False):
+    """Изменяет остатки и пишет журнал одним запросом: {equipment_id: изменение}.
+
+    quantity_available ограничивается диапазоном [0, quantity_total], при
+    `fleet=True` на то же число меняется и размер парка. В журнал попадает
+    фактически применённое изменение (UPDATE ... RETURNING со старым
+    значением), поэтому журнал совпадает со счётчиком и при упоре в границы.
+    Возвращает {equipment_id: применённое изменение} без нулевых.
+    """
+    quantities = {pk: units for pk, units in quantities.items() if units}
+    if not quantities:
+        return {}
+    table = Equipment._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH changed AS (
+                UPDATE {table} AS eq
+                SET quantity_total = GREATEST(eq.quantity_total + delta.fleet_units, 0),
+                    quantity_available = LEAST(
+                        GREATEST(old.quantity_available + delta.units, 0),
+                        GREATEST(eq.quantity_total + delta.fleet_units, 0)
+                    )
+                FROM (
+                    SELECT equipment_id, units, CASE WHEN %s THEN units ELSE 0 END AS fleet_units
+                    FROM unnest(%s::bigint[], %s::integer[]) AS input (equipment_id, units)
+                ) AS delta
+                JOIN (
+                    SELECT id, quantity_available FROM {table}
+                    WHERE id = ANY(%s)
+                    FOR UPDATE
+                ) AS old ON old.id = delta.equipment_id
+                WHERE eq.id = delta.equipment_id
+                RETURNING eq.id, eq.quantity_available - old.quantity_available AS applied
+            )
+            INSERT INTO {StockMovement._meta.db_table}
+                (equipment_id, kind, quantity, comment, created_by_id, created_at)
+            SELECT changed.id, %s, changed.applied, %s, %s, NOW()
+            FROM changed
+            WHERE changed.applied <> 0
+            RETURNING equipment_id, quantity
+            """,
+            (
+                fleet,
+                list(quantities), list(quantities.values()),
+                list(quantities),
+                kind, comment[:255], user.pk if user else None,
+            ),
+        )
+        return dict(cursor.fetchall())
+
+
+def write_off_stock(equipment, quantity, user=None, comment=''):
+    """Списывает `quantity` единиц из парка и из доступного остатка."""
+    return change_stock({equipment.pk: -quantity}, StockMovement.Kind.WRITE_OFF, user, comment, fleet=True)
@@ -5,6 +5,8 @@ app_name = 'inventory'
 
 urlpatterns = [
     path('', views.catalog_view, name='catalog'),
+    path('availability/', views.availability_view, name='availability'),
+    path('autocomplete/', views.autocomplete_view, name='autocomplete'),
     path('<slug:slug>/', views.equipment_detail_view, name='equipment_detail'),
     path('category/<slug:category_slug>/', views.category_view, name='category'),
 ]
\ No newline at end of file
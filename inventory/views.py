@@ -1,19 +1,39 @@
+import calendar
+from datetime import date, datetime, timedelta
 from django.shortcuts import render, get_object_or_404
-from django.db.models import Q
+from django.http import JsonResponse
+from core.pagination import paginate
 from .models import Category, Equipment
+from .facets import catalog_facets
+from .search import autocomplete, search_equipment
+
+
+CATALOG_PAGE_SIZE = 24
+
+VALID_SORTS = ['price_per_day', '-price_per_day', 'name', '-name', '-created_at', 'created_at']
+
+# Максимум позиций в одном запросе календаря доступности
+MAX_CALENDAR_EQUIPMENT = 50
+
+
+def _parse_period(start_str, end_str):
+    try:
+        start_date = datetime.strptime(start_str, '%Y-%m-%d').date()
+        end_date = datetime.strptime(end_str, '%Y-%m-%d').date()
+    except (ValueError, TypeError):
+        return None, None
+    if end_date < start_date:
+        return None, None
+    return start_date, end_date
 
 
 def catalog_view(request):
-    equipment_list = Equipment.objects.filter(is_active=True)
+    equipment_list = Equipment.objects.filter(is_active=True).select_related('category')
     categories = Category.objects.filter(is_active=True)
     
     search_query = request.GET.get('search', '')
     if search_query:
-        equipment_list = equipment_list.filter(
-            Q(name__icontains=search_query) |
-            Q(description__icontains=search_query) |
-            Q(brand__icontains=search_query)
-        )
+        equipment_list = search_equipment(equipment_list, search_query)
     
     category_slug = request.GET.get('category', '')
     selected_category = None
@@ -21,12 +41,6 @@ def catalog_view(request):
         selected_category = get_object_or_404(Category, slug=category_slug)
         equipment_list = equipment_list.filter(category=selected_category)
     
-    availability = request.GET.get('availability', '')
-    if availability == 'available':
-        equipment_list = equipment_list.filter(quantity_available__gt=0)
-    elif availability == 'unavailable':
-        equipment_list = equipment_list.filter(quantity_available=0)
-    
     min_price = request.GET.get('min_price', '')
     max_price = request.GET.get('max_price', '')
     if min_price:
@@ -38,18 +52,45 @@ def catalog_view(request):
     if condition:
         equipment_list = equipment_list.filter(condition=condition)
     
-    sort_by = request.GET.get('sort', '-created_at')
-    valid_sorts = ['price_per_day', '-price_per_day', 'name', '-name', '-created_at', 'created_at']
-    if sort_by in valid_sorts:
-        equipment_list = equipment_list.order_by(sort_by)
+    # Доступность — свободные единицы на весь выбранный период (без дат — на
+    # сегодня). Проверяется после остальных фильтров, чтобы загрузка
+    # считалась только по подходящему инвентарю. Если даты заданы, по
+    # умолчанию показывается свободный в эти даты инвентарь.
+    start_date, end_date = _parse_period(request.GET.get('start'), request.GET.get('end'))
+    period = (start_date, end_date) if start_date else (date.today(), date.today())
+    availability = request.GET.get('availability') or ('available' if start_date else '')
+    if availability in ('available', 'unavailable'):
+        from rentals.availability import filter_available
+        available = filter_available(equipment_list, *period)
+        if availability == 'available':
+            equipment_list = available
+        else:
+            equipment_list = equipment_list.exclude(id__in=available.values('id'))
+    
+    sort_by = request.GET.get('sort') or ('relevance' if search_query else '-created_at')
+    if sort_by == 'relevance' and search_query:
+        ordering = '-rank'
+    elif sort_by in VALID_SORTS:
+        ordering = sort_by
+    else:
+        sort_by = ordering = '-created_at'
+    
+    page, pagination_query = paginate(request, equipment_list, ordering, per_page=CATALOG_PAGE_SIZE)
+    facets = catalog_facets(equipment_list, categories, request.GET, period)
     
     context = {
-        'equipment_list': equipment_list,
+        'equipment_list': page,
+        'page': page,
+        'pagination_query': pagination_query,
+        'facets': facets,
         'categories': categories,
         'selected_category': selected_category,
         'search_query': search_query,
         'sort_by': sort_by,
+        'availability': availability,
         'conditions': Equipment.Condition.choices,
+        'start_date': start_date,
+        'end_date': end_date,
     }
     
     return render(request, 'inventory/catalog.html', context)
@@ -76,11 +117,93 @@ def category_view(request, category_slug):
     equipment_list = Equipment.objects.filter(
         category=category,
         is_active=True
-    ).order_by('-created_at')
+    ).select_related('category')
+    
+    sort_by = request.GET.get('sort', '-created_at')
+    if sort_by not in VALID_SORTS:
+        sort_by = '-created_at'
+    
+    page, pagination_query = paginate(request, equipment_list, sort_by, per_page=CATALOG_PAGE_SIZE)
     
     context = {
         'category': category,
-        'equipment_list': equipment_list,
+        'equipment_list': page,
+        'page': page,
+        'pagination_query': pagination_query,
+        'sort_by': sort_by,
     }
     
-    return render(request, 'inventory/category.html', context)
\ No newline at end of file
+    return render(request, 'inventory/category.html', context)
+
+
+def autocomplete_view(request):
+    """Подсказки для строки поиска (JSON или HTML-список для HTMX)."""
+    query = request.GET.get('q') or request.GET.get('search', '')
+    suggestions = autocomplete(query)
+    
+    if request.htmx:
+        return render(request, 'inventory/includes/search_suggestions.html', {
+            'suggestions': suggestions,
+            'query': query,
+        })
+    
+    return JsonResponse({'suggestions': suggestions})
+
+
+def availability_view(request):
+    """Свободные единицы инвентаря по дням месяца.
+
+    Параметры: `equipment` — id через запятую, `month` — ГГГГ-ММ
+    (по умолчанию текущий месяц). Для HTMX-запросов возвращает HTML-календарь
+    первой позиции, иначе JSON.
+    """
+    from rentals.availability import availability_calendar
+
+    try:
+        month_str = request.GET.get('month') or date.today().strftime('%Y-%m')
+        month_start = datetime.strptime(month_str, '%Y-%m').date()
+        equipment_ids = [
+            int(value) for value in request.GET.get('equipment', '').split(',') if value
+        ]
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Некорректные параметры'}, status=400)
+
+    if not equipment_ids or len(equipment_ids) > MAX_CALENDAR_EQUIPMENT:
+        return JsonResponse({'success': False, 'error': 'Некорректный список инвентаря'}, status=400)
+
+    month_end = month_start.replace(day=calendar.monthrange(month_start.year, month_start.month)[1])
+    equipment_list = Equipment.objects.filter(id__in=equipment_ids, is_active=True).only(
+        'id', 'name', 'quantity_total'
+    )
+    free_days = availability_calendar(equipment_list, month_start, month_end)
+
+    if request.htmx:
+        equipment = next((item for item in equipment_list if item.id == equipment_ids[0]), None)
+        if equipment is None:
+            return JsonResponse({'success': False, 'error': 'Инвентарь не найден'}, status=404)
+        days = free_days[equipment.id]
+        weeks = [
+            [(day, days.get(day)) for day in week]
+            for week in calendar.Calendar().monthdatescalendar(month_start.year, month_start.month)
+        ]
+        context = {
+            'equipment': equipment,
+            'weeks': weeks,
+            'month_start': month_start,
+            'prev_month': (month_start.replace(day=1) - timedelta(days=1)).strftime('%Y-%m'),
+            'next_month': (month_end + timedelta(days=1)).strftime('%Y-%m'),
+            'today': date.today(),
+        }
+        return render(request, 'inventory/includes/availability_calendar.html', context)
+
+    return JsonResponse({
+        'success': True,
+        'month': month_start.strftime('%Y-%m'),
+        'equipment': {
+            str(equipment.id): {
+                'quantity_total': equipment.quantity_total,
+                'days': {day.isoformat(): units for day, units in free_days[equipment.id].items()},
+            }
+            for equipment in equipment_list
+        },
+    })
@@ -0,0 +1,264 @@
+"""
+Расчёт доступности инвентаря по датам.
+
+Каждая позиция заказа (RentalItem) резервирует `quantity` единиц на интервал
+[start_date, end_date]. Позиция корзины (CartItem) удерживает единицы так же,
+пока не истёк её `held_until`. Свободный остаток на день — это
+`quantity_total` минус сумма резервов, пересекающих этот день. Пересечение проверяется
+оператором && по daterange(start_date, end_date, '[]') с GiST-индексом,
+суммирование по дням выполняет база данных.
+"""
+import time
+from collections import defaultdict
+from datetime import timedelta
+from django.core.cache import cache
+from django.db import connection
+from django.db.backends.postgresql.psycopg_any import DateRange as DateRangeValue
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Now
+from django.utils import timezone
+from .models import CartItem, DateRange, Rental, RentalItem
+
+
+# Статусы заказов, которые удерживают инвентарь
+RESERVING_STATUSES = [
+    Rental.Status.PENDING,
+    Rental.Status.CONFIRMED,
+    Rental.Status.ACTIVE,
+]
+
+
+CALENDAR_CACHE_TIMEOUT = 60 * 15
+
+# Сколько позиция корзины удерживает инвентарь после добавления/изменения
+HOLD_TIMEOUT = timedelta(minutes=20)
+
+
+def date_range(start_date, end_date):
+    day = start_date
+    while day <= end_date:
+        yield day
+        day += timedelta(days=1)
+
+
+def reservations(start_date, end_date, equipment_ids=None, exclude_cart_id=None):
+    """Резервы, пересекающиеся с периодом (по всему или выбранному инвентарю).
+
+    Включает позиции заказов и действующие удержания в корзинах, кроме
+    корзины `exclude_cart_id` — собственные удержания не должны мешать
+    покупателю менять корзину и оформлять заказ.
+    """
+    period = DateRangeValue(start_date, end_date, '[]')
+    items = RentalItem.objects.annotate(
+        period=DateRange('start_date', 'end_date'),
+    ).filter(
+        rental__status__in=RESERVING_STATUSES,
+        period__overlap=period,
+    )
+    holds = CartItem.objects.annotate(
+        period=DateRange('start_date', 'end_date'),
+    ).filter(
+        held_until__gt=Now(),
+        period__overlap=period,
+    )
+    if exclude_cart_id is not None:
+        holds = holds.exclude(cart_id=exclude_cart_id)
+    if equipment_ids is not None:
+        items = items.filter(equipment_id__in=equipment_ids)
+        holds = holds.filter(equipment_id__in=equipment_ids)
+    fields = ('equipment_id', 'quantity', 'start_date', 'end_date')
+    return items.values_list(*fields).union(holds.values_list(*fields), all=True)
+
+
+def _daily_load_sql(start_date, end_date, equipment_ids=None, exclude_cart_id=None):
+    """SQL с загрузкой по дням: строки (equipment_id, day, units)."""
+    sql, params = reservations(
+        start_date, end_date, equipment_ids, exclude_cart_id
+    ).query.sql_with_params()
+    query = f"""
+        SELECT res.equipment_id, day::date AS day, SUM(res.quantity) AS units
+        FROM ({sql}) AS res (equipment_id, quantity, start_date, end_date)
+        CROSS JOIN LATERAL generate_series(
+            GREATEST(res.start_date, %s::date),
+            LEAST(res.end_date, %s::date),
+            interval '1 day'
+        ) AS day
+        GROUP BY res.equipment_id, day
+    """
+    return query, (*params, start_date, end_date)
+
+
+def reserved_by_day(equipment_ids, start_date, end_date, exclude_cart_id=None):
+    """Зарезервированные единицы по дням: {equipment_id: {day: units}}.
+
+    Один запрос: пересекающиеся резервы разворачиваются в дни через
+    generate_series и группируются по (equipment_id, day).
+    """
+    equipment_ids = list(equipment_ids)
+    result = defaultdict(dict)
+    if not equipment_ids:
+        return result
+
+    query, params = _daily_load_sql(start_date, end_date, equipment_ids, exclude_cart_id)
+    with connection.cursor() as cursor:
+        cursor.execute(query, params)
+        for equipment_id, day, units in cursor.fetchall():
+            result[equipment_id][day] = units
+    return result
+
+
+def free_by_day(equipment_list, start_date, end_date, exclude_cart_id=None):
+    """Свободные единицы по дням: {equipment_id: {day: units}}."""
+    equipment_list = list(equipment_list)
+    reserved = reserved_by_day(
+        [equipment.id for equipment in equipment_list], start_date, end_date, exclude_cart_id
+    )
+    return {
+        equipment.id: {
+            day: max(equipment.quantity_total - reserved[equipment.id].get(day, 0), 0)
+            for day in date_range(start_date, end_date)
+        }
+        for equipment in equipment_list
+    }
+
+
+def overbooked_sql(queryset, start_date, end_date, quantity=1):
+    """Подзапрос с id инвентаря из `queryset`, у которого хотя бы в один день
+    периода свободно меньше `quantity` единиц: (sql, params).
+
+    Загрузка по дням считается только по резервам инвентаря из `queryset`.
+    """
+    load_sql, params = _daily_load_sql(
+        start_date, end_date, equipment_ids=queryset.order_by().values('id')
+    )
+    sql = f"""
+        SELECT load.equipment_id
+        FROM ({load_sql}) AS load
+        JOIN {queryset.model._meta.db_table} AS eq ON eq.id = load.equipment_id
+        WHERE eq.quantity_total - load.units < %s
+    """
+    return sql, (*params, quantity)
+
+
+def filter_available(queryset, start_date, end_date, quantity=1):
+    """Оставляет инвентарь, у которого свободно `quantity` единиц на весь период.
+
+    Перегруженный инвентарь исключается подзапросом в том же SQL, без выборки
+    id в Python.
+    """
+    sql, params = overbooked_sql(queryset, start_date, end_date, quantity)
+    return queryset.filter(quantity_total__gte=quantity).exclude(id__in=RawSQL(sql, params))
+
+
+def get_free_quantity(equipment, start_date, end_date, exclude_cart_id=None):
+    """Сколько единиц свободно на каждый день периода."""
+    days = free_by_day([equipment], start_date, end_date, exclude_cart_id)[equipment.id]
+    return min(days.values(), default=0)
+
+
+def find_unavailable(lines, exclude_cart_id=None):
+    """Позиции, которые нельзя забронировать на их даты.
+
+    `lines` — объекты с полями equipment, quantity, start_date и end_date
+    (например, CartItem с select_related('equipment')). Позиции одного
+    инвентаря с пересекающимися датами учитываются совместно.
+    """
+    lines = list(lines)
+    if not lines:
+        return []
+
+    reserved = reserved_by_day(
+        {line.equipment_id for line in lines},
+        min(line.start_date for line in lines),
+        max(line.end_date for line in lines),
+        exclude_cart_id,
+    )
+
+    unavailable = []
+    for line in lines:
+        booked = reserved[line.equipment_id]
+        days = list(date_range(line.start_date, line.end_date))
+        free = min(line.equipment.quantity_total - booked.get(day, 0) for day in days)
+        if line.quantity > free:
+            unavailable.append(line)
+            continue
+        for day in days:
+            booked[day] = booked.get(day, 0) + line.quantity
+    return unavailable
+
+
+def hold_expiry():
+    return timezone.now() + HOLD_TIMEOUT
+
+
+def release_expired_holds():
+    """Снимает истёкшие удержания одним UPDATE и сбрасывает их календари.
+
+    Истёкшие удержания и так не учитываются в расчёте доступности, поэтому
+    запуск по расписанию нужен для очистки и актуальности кэша календарей.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE {CartItem._meta.db_table}
+            SET held_until = NULL
+            WHERE held_until <= %s
+            RETURNING equipment_id
+            """,
+            [timezone.now()],
+        )
+        equipment_ids = [equipment_id for equipment_id, in cursor.fetchall()]
+    invalidate_availability(equipment_ids)
+    return len(equipment_ids)
+
+
+def _version_key(equipment_id):
+    return f'availability:version:{equipment_id}'
+
+
+def invalidate_availability(equipment_ids):
+    """Сбрасывает закэшированные календари выбранного инвентаря."""
+    version = time.time_ns()
+    cache.set_many(
+        {_version_key(equipment_id): version for equipment_id in set(equipment_ids)},
+        timeout=None,
+    )
+
+
+def availability_calendar(equipment_list, start_date, end_date):
+    """Свободные единицы по дням с кэшированием: {equipment_id: {day: units}}.
+
+    Ключ кэша включает версию инвентаря, которая меняется при любом
+    изменении его заказов, поэтому устаревшие записи просто не читаются.
+    Недостающие календари считаются одним запросом.
+    """
+    equipment_list = list(equipment_list)
+    versions = cache.get_many([_version_key(equipment.id) for equipment in equipment_list])
+    keys = {
+        equipment.id: 'availability:{}:{}:{}:{}'.format(
+            equipment.id,
+            versions.get(_version_key(equipment.id), 0),
+            start_date.isoformat(),
+            end_date.isoformat(),
+        )
+        for equipment in equipment_list
+    }
+
+    cached = cache.get_many(keys.values())
+    calendar = {}
+    missing = []
+    for equipment in equipment_list:
+        if keys[equipment.id] in cached:
+            calendar[equipment.id] = cached[keys[equipment.id]]
+        else:
+            missing.append(equipment)
+
+    if missing:
+        computed = free_by_day(missing, start_date, end_date)
+        cache.set_many(
+            {keys[equipment_id]: days for equipment_id, days in computed.items()},
+            timeout=CALENDAR_CACHE_TIMEOUT,
+        )
+        calendar.update(computed)
+
+    return calendar
@@ -0,0 +1,145 @@
+"""
+Оформление заказа из корзины.
+
+Вся операция выполняется в одной транзакции: строки инвентаря из корзины
+блокируются (SELECT ... FOR UPDATE) в порядке id, поэтому параллельные
+оформления одного и того же инвентаря выстраиваются в очередь без
+взаимоблокировок, а проверка доступности видит уже зафиксированные заказы.
+Позиции заказа создаются одним INSERT, остатки списываются одним UPDATE.
+
+Если передан ключ идемпотентности, он записывается в той же транзакции.
+Параллельный повтор с тем же ключом ждёт на уникальном индексе и после
+фиксации первой транзакции получает уже созданный заказ.
+"""
+from collections import Counter
+from datetime import timedelta
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from inventory.models import Equipment, StockMovement
+from inventory.stock import change_stock
+from .availability import find_unavailable, invalidate_availability
+from .models import CheckoutRequest, Rental, RentalItem
+from .rollups import mark_rentals
+from .utils import get_cart_totals, invalidate_cart_summary
+
+
+# Сколько хранятся ключи идемпотентности
+CHECKOUT_KEY_TTL = timedelta(days=1)
+
+
+class CheckoutError(Exception):
+    """Часть позиций корзины недоступна; сами позиции — в `unavailable`."""
+
+    def __init__(self, unavailable):
+        self.unavailable = unavailable
+        super().__init__('Недостаточно свободных единиц')
+
+
+def _decrement_stock(quantities, user, rental):
+    """Списывает `quantity_available` одним UPDATE: {equipment_id: units}."""
+    change_stock(
+        {equipment_id: -units for equipment_id, units in quantities.items()},
+        StockMovement.Kind.CHECKOUT,
+        user,
+        f'Заказ №{rental.pk}',
+    )
+
+
+def find_placed_order(user, idempotency_key):
+    """Заказ, уже созданный по этому ключу идемпотентности, или None."""
+    if not idempotency_key:
+        return None
+    checkout_request = CheckoutRequest.objects.filter(
+        user=user, key=idempotency_key, rental__isnull=False,
+    ).select_related('rental').first()
+    return checkout_request.rental if checkout_request else None
+
+
+def place_order(user, cart, comment='', idempotency_key=None):
+    """Создаёт заказ из корзины пользователя и очищает корзину.
+
+    Бросает CheckoutError, если какие-то позиции нельзя забронировать
+    на их даты; в этом случае ничего не изменяется. При повторе с тем же
+    `idempotency_key` возвращает ранее созданный заказ, не трогая остатки.
+    """
+    rental = find_placed_order(user, idempotency_key)
+    if rental is not None:
+        return rental
+
+    try:
+        return _place_order(user, cart, comment, idempotency_key)
+    except IntegrityError:
+        rental = find_placed_order(user, idempotency_key)
+        if rental is None:
+            raise
+        return rental
+
+
+def _place_order(user, cart, comment, idempotency_key):
+    with transaction.atomic():
+        checkout_request = None
+        if idempotency_key:
+            checkout_request = CheckoutRequest.objects.create(user=user, key=idempotency_key)
+
+        cart_items = list(cart.items.select_related('equipment').order_by('id'))
+        quantities = Counter()
+        for cart_item in cart_items:
+            quantities[cart_item.equipment_id] += cart_item.quantity
+
+        list(
+            Equipment.objects.select_for_update()
+            .filter(id__in=quantities)
+            .order_by('id')
+            .values_list('id', flat=True)
+        )
+
+        unavailable = find_unavailable(cart_items, exclude_cart_id=cart.id)
+        if unavailable:
+            raise CheckoutError(unavailable)
+
+        rental = Rental.objects.create(
+            user=user,
+            start_date=min(item.start_date for item in cart_items),
+            end_date=max(item.end_date for item in cart_items),
+            total_price=get_cart_totals(cart.items.all())['total'],
+            comment=comment,
+            status=Rental.Status.PENDING
+        )
+
+        if checkout_request is not None:
+            checkout_request.rental = rental
+            checkout_request.save(update_fields=['rental'])
+
+        RentalItem.objects.bulk_create([
+            RentalItem(
+                rental=rental,
+                equipment=cart_item.equipment,
+                quantity=cart_item.quantity,
+                price_per_day=cart_item.equipment.price_per_day,
+                days=cart_item.days,
+                # save() не вызывается, поэтому подытог задаём явно
+                subtotal=cart_item.equipment.price_per_day * cart_item.quantity * cart_item.days,
+                start_date=cart_item.start_date,
+                end_date=cart_item.end_date,
+            )
+            for cart_item in cart_items
+        ])
+        # bulk_create не отправляет сигналы, дни позиций ставим в очередь сводок сами
+        mark_rentals([rental.pk])
+
+        _decrement_stock(quantities, user, rental)
+        cart.clear()
+
+        # bulk_create и update() не отправляют сигналы, кэши сбрасываем сами
+        transaction.on_commit(lambda: invalidate_availability(quantities))
+        transaction.on_commit(lambda: invalidate_cart_summary(user.id))
+
+    return rental
+
+
+def purge_checkout_requests():
+    """Удаляет ключи идемпотентности старше CHECKOUT_KEY_TTL одним DELETE."""
+    deleted, _ = CheckoutRequest.objects.filter(
+        created_at__lt=timezone.now() - CHECKOUT_KEY_TTL,
+    ).delete()
+    return deleted
@@ -1,4 +1,5 @@
-from .utils import get_or_create_cart
+from django.utils.functional import SimpleLazyObject
+from .utils import get_cart_summary
 
 
 def cart_context(request):
@@ -6,16 +7,17 @@ def cart_context(request):
 
     Возвращает словарь с `cart_total_items` и `cart_total_price`.
     Если пользователь не аутентифицирован — значения будут равны 0.
+    Значения ленивые: сводка корзины запрашивается только при обращении
+    к ним из шаблона.
     """
-    cart_total_items = 0
-    cart_total_price = 0
-
-    if request.user.is_authenticated:
-        cart = get_or_create_cart(request.user)
-        cart_total_items = cart.total_items
-        cart_total_price = cart.total_price
+    if not request.user.is_authenticated:
+        return {
+            'cart_total_items': 0,
+            'cart_total_price': 0,
+        }
 
+    user_id = request.user.id
     return {
-        'cart_total_items': cart_total_items,
-        'cart_total_price': cart_total_price,
+        'cart_total_items': SimpleLazyObject(lambda: get_cart_summary(user_id)['total_items']),
+        'cart_total_price': SimpleLazyObject(lambda: get_cart_summary(user_id)['total_price']),
     }
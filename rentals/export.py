@@ -0,0 +1,110 @@
+"""
+Выгрузка заказов для бухгалтерии.
+
+Одна строка на позицию заказа: заказ, клиент, инвентарь и суммы. Строки
+читаются серверным курсором порциями по EXPORT_CHUNK_SIZE и сразу
+записываются в CSV или XLSX, поэтому память не растёт с объёмом выгрузки.
+"""
+import csv
+from django.utils import timezone
+from core.xlsx import stream_xlsx
+from .models import Rental
+
+
+EXPORT_CHUNK_SIZE = 2000
+
+# Сколько строк CSV собирать в одну порцию ответа
+CSV_BATCH_ROWS = 500
+
+EXPORT_COLUMNS = [
+    ('id', '№ заказа'),
+    ('created_at', 'Дата оформления'),
+    ('status', 'Статус'),
+    ('user__username', 'Логин'),
+    ('user__last_name', 'Фамилия'),
+    ('user__first_name', 'Имя'),
+    ('user__email', 'Email'),
+    ('start_date', 'Начало аренды'),
+    ('end_date', 'Окончание аренды'),
+    ('total_price', 'Сумма заказа (руб.)'),
+    ('items__equipment_id', 'ID инвентаря'),
+    ('items__equipment__name', 'Инвентарь'),
+    ('items__equipment__size', 'Размер'),
+    ('items__start_date', 'Начало позиции'),
+    ('items__end_date', 'Окончание позиции'),
+    ('items__quantity', 'Количество'),
+    ('items__days', 'Дней'),
+    ('items__price_per_day', 'Цена за день (руб.)'),
+    ('items__subtotal', 'Подытог (руб.)'),
+]
+
+# Текст с такого символа Excel и LibreOffice считают формулой
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+}
+
+
+def export_headers():
+    return [label for field, label in EXPORT_COLUMNS]
+
+
+def _safe_cell(value):
+    # Апостроф заставляет табличный редактор показать значение как текст
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def export_rows(rentals):
+    """Строки выгрузки для queryset заказов (позиции через LEFT JOIN).
+
+    Текст, похожий на формулу (имя клиента, название инвентаря), выводится
+    с апострофом, чтобы при открытии файла он не выполнялся.
+    """
+    fields = [field for field, label in EXPORT_COLUMNS]
+    created_at = fields.index('created_at')
+    status = fields.index('status')
+    status_labels = dict(Rental.Status.choices)
+
+    rows = rentals.order_by('-created_at', '-id', 'items__id').values_list(*fields)
+    for row in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        row = list(row)
+        row[created_at] = timezone.localtime(row[created_at]).replace(tzinfo=None, microsecond=0)
+        row[status] = status_labels.get(row[status], row[status])
+        yield [_safe_cell(value) for value in row]
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def stream_csv(headers, rows):
+    """Генератор строк CSV порциями по CSV_BATCH_ROWS строк.
+
+    Файл начинается с BOM, чтобы Excel открывал кириллицу в UTF-8.
+    """
+    writer = csv.writer(_Echo())
+    batch = ['\ufeff' + writer.writerow(headers)]
+    for row in rows:
+        batch.append(writer.writerow(row))
+        if len(batch) >= CSV_BATCH_ROWS:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
+
+
+def stream_export(rentals, export_format):
+    """Содержимое выгрузки в формате 'csv' или 'xlsx' (генератор)."""
+    rows = export_rows(rentals)
+    if export_format == 'xlsx':
+        return stream_xlsx(export_headers(), rows, sheet_name='Заказы')
+    return stream_csv(export_headers(), rows)
+
+
+def export_filename(export_format):
+    return f"rentals-{timezone.localdate():%Y%m%d}.{EXPORT_FORMATS[export_format][1]}"
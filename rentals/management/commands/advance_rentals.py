@@ -0,0 +1,44 @@
+import time
+from datetime import date
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rentals.status import activate_due_rentals, flag_overdue_rentals
+
+
+class Command(BaseCommand):
+    help = (
+        'Переводит подтверждённые заказы с наступившей датой начала в активные '
+        'и помечает просроченные активные заказы (запускать по расписанию)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date',
+            type=date.fromisoformat,
+            default=None,
+            help='Дата, на которую выполняется расчёт (ГГГГ-ММ-ДД), по умолчанию сегодня',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Сколько заказов обновлять одним запросом',
+        )
+
+    def handle(self, *args, **options):
+        today = options['date'] or timezone.localdate()
+        chunk_size = options['chunk_size']
+
+        started = time.monotonic()
+        activated = activate_due_rentals(today, chunk_size)
+        activation_time = time.monotonic() - started
+
+        started = time.monotonic()
+        flagged = flag_overdue_rentals(today, chunk_size)
+        overdue_time = time.monotonic() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Активировано заказов: {activated} ({activation_time:.2f} с)\n'
+            f'Помечено просроченных: {flagged} ({overdue_time:.2f} с)\n'
+            f'Всего: {activation_time + overdue_time:.2f} с'
+        ))
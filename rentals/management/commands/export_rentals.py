@@ -0,0 +1,59 @@
+import sys
+import time
+from django.core.management.base import BaseCommand
+from django.http import QueryDict
+from rentals.export import EXPORT_FORMATS, stream_export
+from rentals.models import Rental
+from rentals.search import filter_rentals
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает заказы с позициями в CSV или XLSX. Фильтры те же, '
+        'что в списке заказов админ-панели'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format',
+            choices=sorted(EXPORT_FORMATS),
+            default='csv',
+            help='Формат файла',
+        )
+        parser.add_argument(
+            '--output',
+            default='-',
+            help='Путь к файлу, по умолчанию стандартный вывод',
+        )
+        parser.add_argument('--status', default='', help='Статус заказа')
+        parser.add_argument('--date-from', default='', help='Оформлен не раньше (ГГГГ-ММ-ДД)')
+        parser.add_argument('--date-to', default='', help='Оформлен не позже (ГГГГ-ММ-ДД)')
+        parser.add_argument('--search', default='', help='Номер заказа, email или имя клиента')
+
+    def handle(self, *args, **options):
+        params = QueryDict(mutable=True)
+        params.update({
+            'status': options['status'],
+            'date_from': options['date_from'],
+            'date_to': options['date_to'],
+            'search': options['search'],
+        })
+        rentals, _ = filter_rentals(Rental.objects.all(), params)
+        export_format = options['format']
+
+        started = time.monotonic()
+        output = sys.stdout.buffer if options['output'] == '-' else open(options['output'], 'wb')
+        try:
+            written = 0
+            for chunk in stream_export(rentals, export_format):
+                if isinstance(chunk, str):
+                    chunk = chunk.encode()
+                output.write(chunk)
+                written += len(chunk)
+        finally:
+            if output is not sys.stdout.buffer:
+                output.close()
+
+        self.stderr.write(self.style.SUCCESS(
+            f'Выгружено: {written / 1024 / 1024:.1f} МБ ({time.monotonic() - started:.2f} с)'
+        ))
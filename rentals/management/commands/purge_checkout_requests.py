@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from rentals.checkout import purge_checkout_requests
+
+
+class Command(BaseCommand):
+    help = 'Удаляет устаревшие ключи идемпотентности оформления заказа (запускать по расписанию)'
+
+    def handle(self, *args, **kwargs):
+        deleted = purge_checkout_requests()
+        self.stdout.write(self.style.SUCCESS(f'Удалено ключей: {deleted}'))
@@ -0,0 +1,59 @@
+import time
+from datetime import date
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min
+from django.db.models.functions import TruncDate
+from rentals.models import Rental, RentalItem
+from rentals.rollups import REBUILD_CHUNK_DAYS, rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает дневные сводки по заказам и загрузке инвентаря '
+        '(по умолчанию за всю историю заказов)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--start',
+            type=date.fromisoformat,
+            default=None,
+            help='Первый день (ГГГГ-ММ-ДД)',
+        )
+        parser.add_argument(
+            '--end',
+            type=date.fromisoformat,
+            default=None,
+            help='Последний день (ГГГГ-ММ-ДД)',
+        )
+        parser.add_argument(
+            '--chunk-days',
+            type=int,
+            default=REBUILD_CHUNK_DAYS,
+            help='Сколько дней пересчитывать одной транзакцией',
+        )
+
+    def handle(self, *args, **options):
+        start, end = options['start'], options['end']
+        if start is None or end is None:
+            created = Rental.objects.order_by().aggregate(
+                first=Min(TruncDate('created_at')),
+                last=Max(TruncDate('created_at')),
+            )
+            periods = RentalItem.objects.order_by().aggregate(
+                first=Min('start_date'),
+                last=Max('end_date'),
+            )
+            firsts = [day for day in (created['first'], periods['first']) if day]
+            lasts = [day for day in (created['last'], periods['last']) if day]
+            if not firsts:
+                self.stdout.write('Заказов нет, пересчитывать нечего')
+                return
+            start = start or min(firsts)
+            end = end or max(lasts)
+
+        started = time.monotonic()
+        days = rebuild_rollups(start, end, options['chunk_days'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано дней: {days} ({start} – {end}, {time.monotonic() - started:.2f} с)'
+        ))
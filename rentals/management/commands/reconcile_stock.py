@@ -0,0 +1,48 @@
+import json
+import time
+from django.core.management.base import BaseCommand
+from rentals.reconcile import fix_stock_drift, stock_drift
+
+
+class Command(BaseCommand):
+    help = 'Сверяет доступный остаток инвентаря с открытыми заказами и при необходимости исправляет его'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Исправить расхождения одним UPDATE',
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Вывести расхождения в формате JSON',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        rows = list(stock_drift().values(
+            'id', 'name', 'quantity_total', 'open_units', 'quantity_available', 'expected'
+        ))
+
+        if options['json']:
+            self.stdout.write(json.dumps(rows, ensure_ascii=False, indent=2))
+        elif rows:
+            header = f'{"ID":>8}  {"Название":<40} {"Всего":>6} {"В заказах":>9} {"Доступно":>8} {"Ожидается":>9}'
+            self.stdout.write(header)
+            self.stdout.write('-' * len(header))
+            for row in rows:
+                self.stdout.write(
+                    f'{row["id"]:>8}  {row["name"][:40]:<40} {row["quantity_total"]:>6} '
+                    f'{row["open_units"]:>9} {row["quantity_available"]:>8} {row["expected"]:>9}'
+                )
+
+        message = f'Расхождений: {len(rows)} ({time.monotonic() - started:.2f} с)'
+        if options['fix'] and rows:
+            started = time.monotonic()
+            fixed = fix_stock_drift()
+            message += f'\nИсправлено: {len(fixed)} ({time.monotonic() - started:.2f} с)'
+
+        # При --json отчёт идёт в stdout, итоги — в stderr, чтобы не портить JSON
+        output = self.stderr if options['json'] else self.stdout
+        output.write(self.style.SUCCESS(message))
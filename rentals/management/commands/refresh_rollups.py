@@ -0,0 +1,25 @@
+import time
+from django.core.management.base import BaseCommand
+from rentals.rollups import REFRESH_BATCH_SIZE, refresh_pending
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает дневные сводки за дни, отмеченные изменениями заказов '
+        '(запускать по расписанию, например раз в минуту)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=REFRESH_BATCH_SIZE,
+            help='Сколько отметок пересчитывать одной транзакцией',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        processed = refresh_pending(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано отметок: {processed} ({time.monotonic() - started:.2f} с)'
+        ))
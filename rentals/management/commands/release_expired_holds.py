@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from rentals.availability import release_expired_holds
+
+
+class Command(BaseCommand):
+    help = 'Снимает истёкшие удержания инвентаря в корзинах (запускать по расписанию)'
+
+    def handle(self, *args, **kwargs):
+        released = release_expired_holds()
+        self.stdout.write(self.style.SUCCESS(f'Снято удержаний: {released}'))
@@ -0,0 +1,14 @@
+import time
+from django.core.management.base import BaseCommand
+from rentals.popularity import update_popularity
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает популярность инвентаря (запускать по расписанию, например раз в час)'
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        updated = update_popularity()
+        self.stdout.write(self.style.SUCCESS(
+            f'Обновлено товаров: {updated} ({time.monotonic() - started:.2f} с)'
+        ))
@@ -0,0 +1,54 @@
+# Generated by Django 5.0.1 on 2026-10-18 10:53
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_rental_period(apps, schema_editor):
+    Rental = apps.get_model('rentals', 'Rental')
+    RentalItem = apps.get_model('rentals', 'RentalItem')
+    rentals = Rental.objects.filter(pk=OuterRef('rental_id'))
+    RentalItem.objects.update(
+        start_date=Subquery(rentals.values('start_date')[:1]),
+        end_date=Subquery(rentals.values('end_date')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0001_initial'),
+        ('rentals', '0002_cartitem_discount'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rentalitem',
+            name='start_date',
+            field=models.DateField(null=True, verbose_name='Дата начала аренды'),
+        ),
+        migrations.AddField(
+            model_name='rentalitem',
+            name='end_date',
+            field=models.DateField(null=True, verbose_name='Дата окончания аренды'),
+        ),
+        migrations.RunPython(copy_rental_period, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='rentalitem',
+            name='start_date',
+            field=models.DateField(verbose_name='Дата начала аренды'),
+        ),
+        migrations.AlterField(
+            model_name='rentalitem',
+            name='end_date',
+            field=models.DateField(verbose_name='Дата окончания аренды'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='rentalitem',
+            unique_together={('rental', 'equipment', 'start_date', 'end_date')},
+        ),
+        migrations.AddIndex(
+            model_name='rentalitem',
+            index=models.Index(fields=['equipment', 'start_date', 'end_date'], name='rentalitem_equipment_period'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.0.1 on 2026-10-18 10:55
+
+import django.contrib.postgres.indexes
+import rentals.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0001_initial'),
+        ('rentals', '0003_rentalitem_period'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rentalitem',
+            index=django.contrib.postgres.indexes.GistIndex(rentals.models.DateRange('start_date', 'end_date'), name='rentalitem_period_gist'),
+        ),
+    ]
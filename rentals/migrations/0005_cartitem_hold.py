@@ -0,0 +1,23 @@
+# Generated by Django 5.0.1 on 2026-10-18 11:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_category_equipment_count'),
+        ('rentals', '0004_rentalitem_period_gist'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cartitem',
+            name='held_until',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Резерв до'),
+        ),
+        migrations.AddIndex(
+            model_name='cartitem',
+            index=models.Index(condition=models.Q(('held_until__isnull', False)), fields=['equipment', 'held_until'], name='cartitem_active_hold'),
+        ),
+    ]
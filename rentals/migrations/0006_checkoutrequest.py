@@ -0,0 +1,34 @@
+# Generated by Django 5.0.1 on 2026-10-18 11:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentals', '0005_cartitem_hold'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CheckoutRequest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, verbose_name='Ключ идемпотентности')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Дата создания')),
+                ('rental', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='checkout_requests', to='rentals.rental', verbose_name='Заказ')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='checkout_requests', to=settings.AUTH_USER_MODEL, verbose_name='Клиент')),
+            ],
+            options={
+                'verbose_name': 'Запрос оформления заказа',
+                'verbose_name_plural': 'Запросы оформления заказа',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='checkoutrequest',
+            constraint=models.UniqueConstraint(fields=('user', 'key'), name='checkoutrequest_user_key'),
+        ),
+    ]
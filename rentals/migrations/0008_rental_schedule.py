@@ -0,0 +1,28 @@
+# Generated by Django 5.0.1 on 2026-10-18 11:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rentals', '0007_rental_user_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rental',
+            name='is_overdue',
+            field=models.BooleanField(default=False, verbose_name='Просрочен возврат'),
+        ),
+        migrations.AddIndex(
+            model_name='rental',
+            index=models.Index(fields=['status', 'start_date', 'id'], name='rental_status_start'),
+        ),
+        migrations.AddIndex(
+            model_name='rental',
+            index=models.Index(fields=['status', 'end_date', 'id'], name='rental_status_end'),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.0.1 on 2026-10-18 11:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0007_search_trigger_text_columns'),
+        ('rentals', '0008_rental_schedule'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRentalStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('status', models.CharField(choices=[('PENDING', 'Ожидает подтверждения'), ('CONFIRMED', 'Подтверждён'), ('ACTIVE', 'Активная аренда'), ('COMPLETED', 'Завершён'), ('CANCELLED', 'Отменён')], max_length=20, verbose_name='Статус')),
+                ('orders', models.PositiveIntegerField(default=0, verbose_name='Заказов')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Сумма (руб.)')),
+            ],
+            options={
+                'verbose_name': 'Статистика заказов за день',
+                'verbose_name_plural': 'Статистика заказов по дням',
+                'ordering': ['day', 'status'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyCategoryUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('units', models.PositiveIntegerField(default=0, verbose_name='Единиц в аренде')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_usage', to='inventory.category', verbose_name='Категория')),
+            ],
+            options={
+                'verbose_name': 'Аренда категории за день',
+                'verbose_name_plural': 'Аренда категорий по дням',
+                'ordering': ['day'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyEquipmentUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('units', models.PositiveIntegerField(default=0, verbose_name='Единиц в аренде')),
+                ('capacity', models.PositiveIntegerField(default=0, verbose_name='Всего единиц')),
+                ('equipment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_usage', to='inventory.equipment', verbose_name='Инвентарь')),
+            ],
+            options={
+                'verbose_name': 'Загрузка инвентаря за день',
+                'verbose_name_plural': 'Загрузка инвентаря по дням',
+                'ordering': ['day'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailyrentalstats',
+            constraint=models.UniqueConstraint(fields=('day', 'status'), name='dailyrentalstats_day_status'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailycategoryusage',
+            constraint=models.UniqueConstraint(fields=('day', 'category'), name='dailycategoryusage_day_category'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyequipmentusage',
+            constraint=models.UniqueConstraint(fields=('day', 'equipment'), name='dailyequipmentusage_day_equipment'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.1 on 2026-10-18 11:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0008_equipment_popularity'),
+        ('rentals', '0010_rental_created_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='День')),
+                ('equipment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='inventory.equipment', verbose_name='Инвентарь')),
+            ],
+            options={
+                'verbose_name': 'Отметка пересчёта сводок',
+                'verbose_name_plural': 'Очередь пересчёта сводок',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='pendingrollup',
+            constraint=models.UniqueConstraint(fields=('day', 'equipment'), name='pendingrollup_day_equipment', nulls_distinct=False),
+        ),
+    ]
@@ -1,8 +1,30 @@
 from django.db import models
+from django.contrib.postgres.fields import DateRangeField
+from django.contrib.postgres.indexes import GistIndex
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
+from django.utils.functional import cached_property
 from accounts.models import User
-from inventory.models import Equipment
+from inventory.models import Category, Equipment
+
+
+class DateRange(models.Func):
+    """Закрытый интервал дат: daterange(start, end, '[]')."""
+    function = 'DATERANGE'
+    output_field = DateRangeField()
+
+    def __init__(self, start, end, **extra):
+        super().__init__(start, end, models.Value('[]'), **extra)
+
+
+class RentalDays(models.Func):
+    """Число дней аренды включительно: end_date - start_date + 1."""
+    template = '(%(expressions)s + 1)'
+    arg_joiner = ' - '
+    output_field = models.IntegerField()
+
+    def __init__(self, start='start_date', end='end_date', **extra):
+        super().__init__(end, start, **extra)
 
 
 class Rental(models.Model):
@@ -63,6 +85,11 @@ class Rental(models.Model):
         verbose_name='Дата подтверждения'
     )
     
+    is_overdue = models.BooleanField(
+        default=False,
+        verbose_name='Просрочен возврат'
+    )
+    
     confirmed_by = models.ForeignKey(
         User,
         on_delete=models.SET_NULL,
@@ -76,6 +103,15 @@ class Rental(models.Model):
         verbose_name = 'Аренда'
         verbose_name_plural = 'Аренды'
         ordering = ['-created_at']
+        indexes = [
+            # Список заказов в админ-панели: сортировка по дате и фильтр по статусу
+            models.Index(fields=['created_at', 'id'], name='rental_created_id'),
+            models.Index(fields=['status', 'created_at', 'id'], name='rental_status_created'),
+            models.Index(fields=['status', 'start_date', 'id'], name='rental_status_start'),
+            models.Index(fields=['status', 'end_date', 'id'], name='rental_status_end'),
+            models.Index(fields=['user', 'created_at', 'id'], name='rental_user_created'),
+            models.Index(fields=['user', 'status', 'created_at', 'id'], name='rental_user_status_created'),
+        ]
     
     def __str__(self):
         return f"Заказ №{self.pk} - {self.user.username} ({self.get_status_display()})"
@@ -133,15 +169,38 @@ class RentalItem(models.Model):
         verbose_name='Подытог (руб.)'
     )
     
+    start_date = models.DateField(
+        verbose_name='Дата начала аренды'
+    )
+    
+    end_date = models.DateField(
+        verbose_name='Дата окончания аренды'
+    )
+    
     class Meta:
         verbose_name = 'Позиция аренды'
         verbose_name_plural = 'Позиции аренды'
-        unique_together = ['rental', 'equipment']
+        unique_together = ['rental', 'equipment', 'start_date', 'end_date']
+        indexes = [
+            models.Index(
+                fields=['equipment', 'start_date', 'end_date'],
+                name='rentalitem_equipment_period'
+            ),
+            GistIndex(
+                DateRange('start_date', 'end_date'),
+                name='rentalitem_period_gist'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.equipment.name} x{self.quantity} ({self.days} дн.)"
     
     def save(self, *args, **kwargs):
+        # Период позиции по умолчанию совпадает с периодом заказа
+        if self.start_date is None:
+            self.start_date = self.rental.start_date
+        if self.end_date is None:
+            self.end_date = self.rental.end_date
         self.subtotal = self.price_per_day * self.quantity * self.days
         super().save(*args, **kwargs)
 
@@ -217,17 +276,22 @@ class Cart(models.Model):
     def __str__(self):
         return f"Корзина {self.user.username}"
     
+    @cached_property
+    def totals(self):
+        from .utils import get_cart_totals
+        return get_cart_totals(self.items.all())
+    
     @property
     def total_items(self):
-        return self.items.count()
+        return self.totals['total_items']
     
     @property
     def total_price(self):
-        total = sum(item.subtotal for item in self.items.all())
-        return total
+        return self.totals['total']
     
     def clear(self):
         self.items.all().delete()
+        self.__dict__.pop('totals', None)
 
 
 class CartItem(models.Model):
@@ -267,6 +331,12 @@ class CartItem(models.Model):
         verbose_name='Скидка (руб.)'
     )
     
+    held_until = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Резерв до'
+    )
+    
     added_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name='Дата добавления'
@@ -276,6 +346,13 @@ class CartItem(models.Model):
         verbose_name = 'Позиция корзины'
         verbose_name_plural = 'Позиции корзины'
         unique_together = ['cart', 'equipment', 'start_date', 'end_date']
+        indexes = [
+            models.Index(
+                fields=['equipment', 'held_until'],
+                name='cartitem_active_hold',
+                condition=models.Q(held_until__isnull=False),
+            ),
+        ]
     
     def __str__(self):
         return f"{self.equipment.name} x{self.quantity}"
@@ -287,4 +364,187 @@ class CartItem(models.Model):
     @property
     def subtotal(self):
         base_price = self.equipment.price_per_day * self.quantity * self.days
-        return base_price - self.discount
\ No newline at end of file
+        return base_price - self.discount
+
+
+class CheckoutRequest(models.Model):
+    """Ключ идемпотентности оформления заказа.
+
+    Повторный POST с тем же ключом (двойной клик, повтор запроса сетью или
+    прокси) возвращает уже созданный заказ. Уникальность ключа обеспечивает
+    база данных, поэтому защита работает между всеми воркерами.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='checkout_requests',
+        verbose_name='Клиент'
+    )
+    
+    key = models.CharField(
+        max_length=64,
+        verbose_name='Ключ идемпотентности'
+    )
+    
+    rental = models.ForeignKey(
+        Rental,
+        on_delete=models.CASCADE,
+        null=True,
+        related_name='checkout_requests',
+        verbose_name='Заказ'
+    )
+    
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name='Дата создания'
+    )
+    
+    class Meta:
+        verbose_name = 'Запрос оформления заказа'
+        verbose_name_plural = 'Запросы оформления заказа'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='checkoutrequest_user_key'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username}: {self.key}"
+
+
+class DailyRentalStats(models.Model):
+    """Заказы и выручка за день (по дате оформления) в разрезе статусов."""
+    day = models.DateField(
+        verbose_name='День'
+    )
+    
+    status = models.CharField(
+        max_length=20,
+        choices=Rental.Status.choices,
+        verbose_name='Статус'
+    )
+    
+    orders = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Заказов'
+    )
+    
+    revenue = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        verbose_name='Сумма (руб.)'
+    )
+    
+    class Meta:
+        verbose_name = 'Статистика заказов за день'
+        verbose_name_plural = 'Статистика заказов по дням'
+        ordering = ['day', 'status']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'status'], name='dailyrentalstats_day_status'),
+        ]
+    
+    def __str__(self):
+        return f"{self.day} {self.get_status_display()}: {self.orders}"
+
+
+class DailyCategoryUsage(models.Model):
+    """Единицы инвентаря категории, находившиеся в аренде в этот день."""
+    day = models.DateField(
+        verbose_name='День'
+    )
+    
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name='daily_usage',
+        verbose_name='Категория'
+    )
+    
+    units = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Единиц в аренде'
+    )
+    
+    class Meta:
+        verbose_name = 'Аренда категории за день'
+        verbose_name_plural = 'Аренда категорий по дням'
+        ordering = ['day']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'category'], name='dailycategoryusage_day_category'),
+        ]
+    
+    def __str__(self):
+        return f"{self.day} {self.category}: {self.units}"
+
+
+class DailyEquipmentUsage(models.Model):
+    """Загрузка инвентаря за день: единицы в аренде и размер парка."""
+    day = models.DateField(
+        verbose_name='День'
+    )
+    
+    equipment = models.ForeignKey(
+        Equipment,
+        on_delete=models.CASCADE,
+        related_name='daily_usage',
+        verbose_name='Инвентарь'
+    )
+    
+    units = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Единиц в аренде'
+    )
+    
+    capacity = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Всего единиц'
+    )
+    
+    class Meta:
+        verbose_name = 'Загрузка инвентаря за день'
+        verbose_name_plural = 'Загрузка инвентаря по дням'
+        ordering = ['day']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'equipment'], name='dailyequipmentusage_day_equipment'),
+        ]
+    
+    def __str__(self):
+        return f"{self.day} {self.equipment}: {self.units}/{self.capacity}"
+    
+    @property
+    def utilization(self):
+        return self.units / self.capacity if self.capacity else 0
+
+
+class PendingRollup(models.Model):
+    """День, сводки за который нужно пересчитать (очередь команды refresh_rollups).
+
+    Без инвентаря — статистика заказов за день оформления, с инвентарём —
+    загрузка этого инвентаря и его категории.
+    """
+    day = models.DateField(
+        verbose_name='День'
+    )
+    
+    equipment = models.ForeignKey(
+        Equipment,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Инвентарь'
+    )
+    
+    class Meta:
+        verbose_name = 'Отметка пересчёта сводок'
+        verbose_name_plural = 'Очередь пересчёта сводок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'equipment'],
+                nulls_distinct=False,
+                name='pendingrollup_day_equipment',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.day} {self.equipment_id or 'заказы'}"
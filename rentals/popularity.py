@@ -0,0 +1,67 @@
+"""
+Популярность инвентаря.
+
+Каждая аренда за последний год добавляет инвентарю вес
+1 + UNIT_DAYS_WEIGHT * (единицы * дни), который убывает вдвое каждые
+HALF_LIFE_DAYS дней с момента оформления заказа. Результат хранится в
+индексированном поле Equipment.popularity, поэтому главная страница и
+дашборд берут топ одним запросом по индексу. Пересчёт выполняет команда
+update_popularity по расписанию.
+"""
+from datetime import timedelta
+from django.db import connection
+from django.utils import timezone
+from inventory.models import Equipment
+from .models import Rental, RentalItem
+from .rollups import USAGE_STATUSES
+
+
+HALF_LIFE_DAYS = 30
+UNIT_DAYS_WEIGHT = 0.1
+WINDOW = timedelta(days=365)
+
+
+def most_popular(limit, queryset=None):
+    """Топ инвентаря по популярности (индекс equipment_popularity_id)."""
+    if queryset is None:
+        queryset = Equipment.objects.all()
+    return queryset.filter(
+        popularity__gt=0,
+    ).select_related('category').order_by('-popularity', '-id')[:limit]
+
+
+def update_popularity(now=None):
+    """Пересчитывает popularity и rental_count всего инвентаря одним UPDATE.
+
+    Строки, у которых значения не изменились, не перезаписываются.
+    Возвращает число обновлённых строк.
+    """
+    now = now or timezone.now()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH scores AS (
+                SELECT item.equipment_id,
+                       COUNT(DISTINCT item.rental_id) AS rentals,
+                       SUM(
+                           POWER(0.5, EXTRACT(EPOCH FROM (%s - rental.created_at)) / 86400 / %s)
+                           * (1 + %s * item.quantity * item.days)
+                       ) AS score
+                FROM {RentalItem._meta.db_table} AS item
+                JOIN {Rental._meta.db_table} AS rental ON rental.id = item.rental_id
+                WHERE rental.status = ANY(%s) AND rental.created_at >= %s
+                GROUP BY item.equipment_id
+            )
+            UPDATE {Equipment._meta.db_table} AS eq
+            SET popularity = new.score, rental_count = new.rentals
+            FROM (
+                SELECT e.id, COALESCE(scores.score, 0) AS score, COALESCE(scores.rentals, 0) AS rentals
+                FROM {Equipment._meta.db_table} AS e
+                LEFT JOIN scores ON scores.equipment_id = e.id
+            ) AS new
+            WHERE eq.id = new.id
+              AND (eq.popularity, eq.rental_count) IS DISTINCT FROM (new.score, new.rentals)
+            """,
+            [now, HALF_LIFE_DAYS, UNIT_DAYS_WEIGHT, list(USAGE_STATUSES), now - WINDOW],
+        )
+        return cursor.rowcount
@@ -0,0 +1,72 @@
+"""
+Расчёт стоимости аренды.
+
+Скидка зависит от длительности аренды и задаётся таблицей порогов
+RENTAL_DISCOUNT_TIERS в настройках: [(минимум дней, доля скидки), ...].
+Таблица разбирается один раз и кэшируется в процессе.
+"""
+from decimal import Decimal
+from functools import lru_cache
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from inventory.models import Equipment
+
+
+@lru_cache(maxsize=None)
+def get_discount_tiers():
+    """Пороги скидок по убыванию числа дней: ((дней, доля), ...)."""
+    return tuple(sorted(
+        ((int(days), Decimal(str(rate))) for days, rate in settings.RENTAL_DISCOUNT_TIERS),
+        reverse=True,
+    ))
+
+
+@receiver(setting_changed)
+def reset_discount_tiers(setting, **kwargs):
+    if setting == 'RENTAL_DISCOUNT_TIERS':
+        get_discount_tiers.cache_clear()
+
+
+def discount_rate(days):
+    for min_days, rate in get_discount_tiers():
+        if days >= min_days:
+            return rate
+    return Decimal('0')
+
+
+def quote(price_per_day, quantity, start_date, end_date):
+    """Стоимость аренды `quantity` единиц по цене `price_per_day` за период."""
+    days = (end_date - start_date).days + 1
+    total = price_per_day * quantity * days
+    discount = total * discount_rate(days)
+
+    return {
+        'base_price': price_per_day,
+        'quantity': quantity,
+        'days': days,
+        'subtotal': total,
+        'discount': discount,
+        'discount_percent': (discount / total * 100) if total > 0 else 0,
+        'total': total - discount,
+    }
+
+
+def quote_many(lines):
+    """Расчёт для набора строк (equipment_id, quantity, start_date, end_date).
+
+    Цены загружаются одним запросом. Для неизвестного или неактивного
+    инвентаря вместо расчёта возвращается None.
+    """
+    lines = list(lines)
+    prices = dict(
+        Equipment.objects.filter(
+            id__in={equipment_id for equipment_id, *_ in lines},
+            is_active=True,
+        ).values_list('id', 'price_per_day')
+    )
+    return [
+        quote(prices[equipment_id], quantity, start_date, end_date)
+        if equipment_id in prices else None
+        for equipment_id, quantity, start_date, end_date in lines
+    ]
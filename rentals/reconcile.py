@@ -0,0 +1,83 @@
+"""
+Сверка счётчика `Equipment.quantity_available` с открытыми заказами.
+
+Ожидаемый остаток — `quantity_total` минус единицы в заказах, которые ещё
+не вернули инвентарь (RESERVING_STATUSES), но не меньше нуля. Расхождения
+считаются одним запросом с группировкой и исправляются одним UPDATE
+вместе с записью корректировок в журнал остатков.
+"""
+from django.db import connection, transaction
+from django.db.models import F, Q, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+from inventory.models import Equipment, StockMovement
+from .availability import RESERVING_STATUSES
+
+
+def stock_drift():
+    """Инвентарь, у которого счётчик расходится с ожидаемым остатком.
+
+    Аннотации: `open_units` — единиц в открытых заказах, `expected` —
+    ожидаемый остаток.
+    """
+    return Equipment.objects.annotate(
+        open_units=Coalesce(
+            Sum(
+                'rental_items__quantity',
+                filter=Q(rental_items__rental__status__in=RESERVING_STATUSES),
+            ),
+            Value(0),
+        ),
+    ).annotate(
+        expected=Greatest(F('quantity_total') - F('open_units'), Value(0)),
+    ).exclude(
+        quantity_available=F('expected'),
+    ).order_by('id')
+
+
+def fix_stock_drift(user=None):
+    """Выставляет ожидаемый остаток и пишет корректировки в журнал.
+
+    Строки инвентаря с расхождением сначала блокируются в порядке id, как при
+    оформлении заказа, и расхождение пересчитывается уже под блокировкой:
+    иначе оформление, зафиксированное между подсчётом и UPDATE, было бы
+    перезаписано устаревшим значением. Обновление и запись журнала
+    выполняются одним запросом (UPDATE ... RETURNING внутри INSERT).
+    Возвращает {equipment_id: изменение}.
+    """
+    with transaction.atomic():
+        drifted = list(stock_drift().values_list('id', flat=True))
+        locked = list(
+            Equipment.objects.select_for_update()
+            .filter(id__in=drifted)
+            .order_by('id')
+            .values_list('id', flat=True)
+        )
+        return _fix_locked_drift(locked, user)
+
+
+def _fix_locked_drift(equipment_ids, user):
+    if not equipment_ids:
+        return {}
+    drift = stock_drift().filter(id__in=equipment_ids).values_list(
+        'id', 'quantity_available', 'expected'
+    )
+    sql, params = drift.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH changed AS (
+                UPDATE {Equipment._meta.db_table} AS eq
+                SET quantity_available = drift.expected
+                FROM ({sql}) AS drift (id, current, expected)
+                WHERE eq.id = drift.id
+                RETURNING eq.id, drift.expected - drift.current AS delta
+            )
+            INSERT INTO {StockMovement._meta.db_table}
+                (equipment_id, kind, quantity, comment, created_by_id, created_at)
+            SELECT changed.id, %s, changed.delta, %s, %s, NOW()
+            FROM changed
+            RETURNING equipment_id, quantity
+            """,
+            (*params, StockMovement.Kind.ADJUST, 'Сверка остатков', user.pk if user else None),
+        )
+        return dict(cursor.fetchall())
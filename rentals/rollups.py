@@ -0,0 +1,271 @@
+"""
+Дневные сводные таблицы для отчётов.
+
+DailyRentalStats — заказы и выручка по дню оформления и статусу,
+DailyEquipmentUsage — единицы инвентаря в аренде по дням,
+DailyCategoryUsage — то же по категориям (считается из загрузки инвентаря).
+
+Изменение заказа только ставит затронутые дни в очередь PendingRollup (в той
+же транзакции, без блокировок и пересчёта). Очередь разбирает команда
+refresh_rollups по расписанию: строки затронутых дней удаляются и собираются
+заново одним INSERT ... SELECT на таблицу, загрузка — только для отмеченного
+инвентаря и его категорий. Историю заполняет команда rebuild_rollups.
+Отчёты за любой период читают несколько сотен готовых строк вместо
+агрегации по Rental/RentalItem.
+"""
+from datetime import datetime, time, timedelta
+from django.db import connection, transaction
+from django.db.backends.postgresql.psycopg_any import DateRange as DateRangeValue
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from inventory.models import Equipment
+from .availability import date_range
+from .models import (
+    DailyCategoryUsage, DailyEquipmentUsage, DailyRentalStats, DateRange,
+    PendingRollup, Rental, RentalItem,
+)
+
+
+# Заказы, инвентарь которых считается занятым (отменённые не учитываются)
+USAGE_STATUSES = [
+    Rental.Status.PENDING,
+    Rental.Status.CONFIRMED,
+    Rental.Status.ACTIVE,
+    Rental.Status.COMPLETED,
+]
+
+# Сколько дней пересчитывать одной транзакцией при заполнении истории
+REBUILD_CHUNK_DAYS = 31
+
+# Сколько отметок очереди разбирать за один пересчёт
+REFRESH_BATCH_SIZE = 1000
+
+
+def _lock():
+    # Пересчёты одного дня из разных процессов не должны пересекаться
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext('rentals_rollups'))")
+
+
+def _day_bounds(days):
+    tz = timezone.get_current_timezone()
+    return (
+        datetime.combine(days[0], time.min, tzinfo=tz),
+        datetime.combine(days[-1] + timedelta(days=1), time.min, tzinfo=tz),
+    )
+
+
+def _refresh_rental_stats(days):
+    start, end = _day_bounds(days)
+    rows = Rental.objects.filter(
+        created_at__gte=start,
+        created_at__lt=end,
+    ).annotate(
+        day=TruncDate('created_at'),
+    ).filter(
+        day__in=days,
+    ).order_by().values('status', 'day').annotate(
+        orders=Count('id'),
+        revenue=Sum('total_price'),
+    ).values_list('status', 'day', 'orders', 'revenue')
+    sql, params = rows.query.sql_with_params()
+
+    DailyRentalStats.objects.filter(day__in=days).delete()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {DailyRentalStats._meta.db_table} (day, status, orders, revenue)
+            SELECT stats.day, stats.status, stats.orders, stats.revenue
+            FROM ({sql}) AS stats (status, day, orders, revenue)
+            """,
+            params,
+        )
+
+
+def _refresh_usage(days, equipment_ids=None):
+    start, end = days[0], days[-1]
+    # Пересечение периодов идёт по GiST-индексу rentalitem_period_gist
+    items = RentalItem.objects.annotate(
+        period=DateRange('start_date', 'end_date'),
+    ).filter(
+        rental__status__in=USAGE_STATUSES,
+        period__overlap=DateRangeValue(start, end, '[]'),
+    )
+    usage_rows = DailyEquipmentUsage.objects.filter(day__in=days)
+    category_rows = DailyCategoryUsage.objects.filter(day__in=days)
+    category_ids = None
+    if equipment_ids is not None:
+        equipment_ids = list(equipment_ids)
+        category_ids = list(
+            Equipment.objects.filter(id__in=equipment_ids)
+            .order_by().values_list('category_id', flat=True).distinct()
+        )
+        items = items.filter(equipment_id__in=equipment_ids)
+        usage_rows = usage_rows.filter(equipment_id__in=equipment_ids)
+        category_rows = category_rows.filter(category_id__in=category_ids)
+    sql, params = items.values_list(
+        'equipment_id', 'quantity', 'start_date', 'end_date',
+    ).query.sql_with_params()
+
+    usage_rows.delete()
+    category_rows.delete()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {DailyEquipmentUsage._meta.db_table} (day, equipment_id, units, capacity)
+            SELECT day::date, items.equipment_id, SUM(items.quantity), eq.quantity_total
+            FROM ({sql}) AS items (equipment_id, quantity, start_date, end_date)
+            CROSS JOIN LATERAL generate_series(
+                GREATEST(items.start_date, %s::date),
+                LEAST(items.end_date, %s::date),
+                interval '1 day'
+            ) AS day
+            JOIN {Equipment._meta.db_table} AS eq ON eq.id = items.equipment_id
+            WHERE day::date = ANY(%s)
+            GROUP BY day, items.equipment_id, eq.quantity_total
+            """,
+            (*params, start, end, days),
+        )
+        cursor.execute(
+            f"""
+            INSERT INTO {DailyCategoryUsage._meta.db_table} (day, category_id, units)
+            SELECT daily.day, eq.category_id, SUM(daily.units)
+            FROM {DailyEquipmentUsage._meta.db_table} AS daily
+            JOIN {Equipment._meta.db_table} AS eq ON eq.id = daily.equipment_id
+            WHERE daily.day = ANY(%s)
+              AND (%s::bigint[] IS NULL OR eq.category_id = ANY(%s::bigint[]))
+            GROUP BY daily.day, eq.category_id
+            """,
+            (days, category_ids, category_ids),
+        )
+
+
+def refresh_days(stats_days=(), usage_days=(), equipment_ids=None):
+    """Пересчитывает сводки за указанные дни.
+
+    `equipment_ids` ограничивает пересчёт загрузки этим инвентарём и его
+    категориями; None — весь инвентарь.
+    """
+    stats_days = sorted(set(stats_days))
+    usage_days = sorted(set(usage_days))
+    if not stats_days and not usage_days:
+        return
+    with transaction.atomic():
+        _lock()
+        if stats_days:
+            _refresh_rental_stats(stats_days)
+        if usage_days:
+            _refresh_usage(usage_days, equipment_ids)
+
+
+def mark_days(stats_days=(), usage=()):
+    """Ставит дни в очередь пересчёта.
+
+    `stats_days` — дни оформления заказов, `usage` — пары (день, id инвентаря).
+    """
+    marks = [PendingRollup(day=day) for day in set(stats_days)]
+    marks += [
+        PendingRollup(day=day, equipment_id=equipment_id)
+        for day, equipment_id in set(usage)
+    ]
+    PendingRollup.objects.bulk_create(marks, ignore_conflicts=True)
+
+
+def mark_rentals(rental_ids, usage=True):
+    """Ставит в очередь дни оформления заказов и, если `usage`, дни аренды
+    их позиций (INSERT ... SELECT, без выборки строк в Python).
+
+    `usage=False` — статусы менялись только внутри USAGE_STATUSES и загрузка
+    инвентаря не изменилась.
+    """
+    rental_ids = list(rental_ids)
+    table = PendingRollup._meta.db_table
+    created = (
+        Rental.objects.filter(id__in=rental_ids)
+        .annotate(day=TruncDate('created_at'))
+        .order_by().values_list('day').distinct()
+    )
+    sql, params = created.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {table} (day, equipment_id)
+            SELECT created.day, NULL FROM ({sql}) AS created (day)
+            ON CONFLICT DO NOTHING
+            """,
+            params,
+        )
+        if usage:
+            cursor.execute(
+                f"""
+                INSERT INTO {table} (day, equipment_id)
+                SELECT DISTINCT day::date, item.equipment_id
+                FROM {RentalItem._meta.db_table} AS item
+                CROSS JOIN LATERAL generate_series(
+                    item.start_date, item.end_date, interval '1 day'
+                ) AS day
+                WHERE item.rental_id = ANY(%s)
+                ON CONFLICT DO NOTHING
+                """,
+                (rental_ids,),
+            )
+
+
+def _claim_pending(batch_size):
+    # Отметки удаляются в отдельной короткой транзакции, чтобы новые отметки
+    # тех же дней из запросов не ждали окончания пересчёта
+    table = PendingRollup._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            DELETE FROM {table}
+            WHERE id IN (
+                SELECT id FROM {table}
+                ORDER BY day
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING day, equipment_id
+            """,
+            (batch_size,),
+        )
+        return cursor.fetchall()
+
+
+def refresh_pending(batch_size=REFRESH_BATCH_SIZE):
+    """Разбирает очередь PendingRollup порциями по `batch_size` отметок.
+
+    Возвращает число обработанных отметок.
+    """
+    processed = 0
+    while True:
+        with transaction.atomic():
+            marks = _claim_pending(batch_size)
+        if not marks:
+            return processed
+        stats_days = [day for day, equipment_id in marks if equipment_id is None]
+        usage = [(day, equipment_id) for day, equipment_id in marks if equipment_id is not None]
+        try:
+            refresh_days(
+                stats_days,
+                [day for day, equipment_id in usage],
+                {equipment_id for day, equipment_id in usage},
+            )
+        except Exception:
+            # Вернуть отметки в очередь до следующего запуска
+            mark_days(stats_days, usage)
+            raise
+        processed += len(marks)
+
+
+def rebuild_rollups(start_date, end_date, chunk_days=REBUILD_CHUNK_DAYS):
+    """Заполняет сводки за период порциями по `chunk_days` дней.
+
+    Возвращает число пересчитанных дней.
+    """
+    days = list(date_range(start_date, end_date))
+    for offset in range(0, len(days), chunk_days):
+        chunk = days[offset:offset + chunk_days]
+        refresh_days(chunk, chunk)
+    return len(days)
@@ -0,0 +1,90 @@
+"""
+Поиск и фильтры списка заказов в админ-панели.
+
+Строка поиска разбирается так, чтобы каждый вариант шёл по индексу:
+число (или «#число») — точный поиск по номеру заказа, строка с «@» — email
+клиента без учёта регистра (индекс по UPPER(email)), остальное — слова,
+каждое из которых должно встречаться в логине, имени или фамилии клиента
+(триграммные индексы pg_trgm по UPPER(...) для LIKE). Фильтры по статусу и
+дате оформления используют индексы (created_at, id) и
+(status, created_at, id), по ним же идёт курсорная пагинация.
+"""
+import re
+from datetime import date, datetime, time, timedelta
+from django.db.models import Q
+from django.utils import timezone
+from accounts.models import User
+from .models import Rental
+
+
+RENTALS_ORDERING = '-created_at'
+
+# Максимальное значение bigint: большие номера заведомо не существуют
+MAX_RENTAL_ID = 2 ** 63 - 1
+
+
+def _parse_date(value):
+    try:
+        return date.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+def _day_start(day):
+    return datetime.combine(day, time.min, tzinfo=timezone.get_current_timezone())
+
+
+def search_rentals(queryset, text):
+    """Фильтрует заказы по строке поиска (номер, email или имя клиента)."""
+    text = text.strip()
+    if not text:
+        return queryset
+
+    number = text.lstrip('#')
+    if number.isdigit():
+        rental_id = int(number)
+        if rental_id > MAX_RENTAL_ID:
+            return queryset.none()
+        return queryset.filter(id=rental_id)
+
+    if '@' in text:
+        return queryset.filter(user__email__iexact=text)
+
+    users = User.objects.all()
+    for word in re.findall(r'\w+', text):
+        users = users.filter(
+            Q(username__icontains=word) |
+            Q(first_name__icontains=word) |
+            Q(last_name__icontains=word)
+        )
+    return queryset.filter(user__in=users.values('id'))
+
+
+def filter_rentals(queryset, params):
+    """Применяет фильтры списка заказов из GET-параметров.
+
+    Возвращает (queryset, словарь применённых фильтров для шаблона).
+    """
+    filters = {
+        'search_query': params.get('search', '').strip(),
+        'status_filter': params.get('status', ''),
+        'date_from': _parse_date(params.get('date_from')),
+        'date_to': _parse_date(params.get('date_to')),
+    }
+
+    if filters['status_filter'] in Rental.Status.values:
+        queryset = queryset.filter(status=filters['status_filter'])
+    else:
+        filters['status_filter'] = ''
+
+    if filters['date_from']:
+        queryset = queryset.filter(created_at__gte=_day_start(filters['date_from']))
+    if filters['date_to']:
+        queryset = queryset.filter(
+            created_at__lt=_day_start(filters['date_to'] + timedelta(days=1))
+        )
+
+    if filters['search_query']:
+        queryset = search_rentals(queryset, filters['search_query'])
+
+    return queryset, filters
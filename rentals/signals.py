@@ -0,0 +1,61 @@
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+from inventory.models import Equipment
+from .models import CartItem, Rental, RentalItem
+from .availability import date_range, invalidate_availability
+from .rollups import mark_days, mark_rentals
+
+
+@receiver([post_save, post_delete], sender=RentalItem)
+@receiver([post_save, post_delete], sender=CartItem)
+def rental_item_changed(sender, instance, **kwargs):
+    invalidate_availability([instance.equipment_id])
+
+
+@receiver(post_save, sender=Rental)
+def rental_changed(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_availability(instance.items.values_list('equipment_id', flat=True))
+
+
+@receiver(post_save, sender=Equipment)
+def equipment_changed(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_availability([instance.id])
+
+
+@receiver(post_save, sender=Rental)
+def rental_saved_rollups(sender, instance, created, **kwargs):
+    # У нового заказа ещё нет позиций, их дни отметят сигналы RentalItem
+    mark_rentals([instance.pk], usage=not created)
+
+
+@receiver(post_delete, sender=Rental)
+def rental_deleted_rollups(sender, instance, **kwargs):
+    # Дни позиций отмечают сигналы RentalItem при каскадном удалении
+    mark_days(stats_days=[timezone.localdate(instance.created_at)])
+
+
+@receiver(pre_save, sender=RentalItem)
+def rental_item_period_before(sender, instance, **kwargs):
+    # Если период или инвентарь позиции изменится, старые дни тоже нужно пересчитать
+    instance._stored_period = None
+    if instance.pk:
+        instance._stored_period = (
+            RentalItem.objects.filter(pk=instance.pk)
+            .values_list('equipment_id', 'start_date', 'end_date').first()
+        )
+
+
+@receiver([post_save, post_delete], sender=RentalItem)
+def rental_item_rollups(sender, instance, **kwargs):
+    periods = [(instance.equipment_id, instance.start_date, instance.end_date)]
+    stored = getattr(instance, '_stored_period', None)
+    if stored:
+        periods.append(stored)
+    mark_days(usage=[
+        (day, equipment_id)
+        for equipment_id, start_date, end_date in periods
+        for day in date_range(start_date, end_date)
+    ])
@@ -0,0 +1,162 @@
+"""
+Жизненный цикл заказа.
+
+Допустимые переходы заданы таблицей TRANSITIONS. Переход выполняется для
+набора заказов сразу: строки заказов блокируются, статус меняется одним
+UPDATE, а при завершении или отмене остатки инвентаря возвращаются одним
+UPDATE с суммой единиц по каждому инвентарю.
+"""
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+from inventory.models import StockMovement
+from inventory.stock import change_stock
+from .availability import invalidate_availability
+from .models import Rental, RentalItem
+from .rollups import mark_rentals
+
+
+Status = Rental.Status
+
+TRANSITIONS = {
+    Status.PENDING: {Status.CONFIRMED, Status.CANCELLED},
+    Status.CONFIRMED: {Status.ACTIVE, Status.CANCELLED},
+    Status.ACTIVE: {Status.COMPLETED},
+    Status.COMPLETED: set(),
+    Status.CANCELLED: set(),
+}
+
+# Статусы, при переходе в которые инвентарь возвращается на склад
+RELEASING_STATUSES = {Status.COMPLETED, Status.CANCELLED}
+
+
+class TransitionError(Exception):
+    pass
+
+
+def can_transition(old_status, new_status):
+    return new_status in TRANSITIONS.get(old_status, set())
+
+
+def allowed_transitions(rental):
+    """Допустимые следующие статусы заказа: [(значение, подпись), ...]."""
+    targets = TRANSITIONS.get(rental.status, set())
+    return [(value, label) for value, label in Status.choices if value in targets]
+
+
+def restore_stock(rental_ids, user=None):
+    """Возвращает единицы позиций заказов в quantity_available одним UPDATE."""
+    returned = dict(
+        RentalItem.objects.filter(rental_id__in=rental_ids)
+        .order_by().values('equipment_id')
+        .annotate(units=Sum('quantity'))
+        .values_list('equipment_id', 'units')
+    )
+    comment = 'Заказы: ' + ', '.join(f'№{pk}' for pk in rental_ids)
+    change_stock(returned, StockMovement.Kind.RETURN, user, comment)
+
+
+def transition_rentals(rental_ids, new_status, user=None):
+    """Переводит заказы в `new_status`, пропуская недопустимые переходы.
+
+    Возвращает (список переведённых id, список пропущенных id).
+    """
+    if new_status not in Status.values:
+        raise TransitionError('Неверный статус')
+
+    with transaction.atomic():
+        rows = list(
+            Rental.objects.select_for_update()
+            .filter(id__in=rental_ids)
+            .order_by('id')
+            .values_list('id', 'status')
+        )
+        changed = [pk for pk, status in rows if can_transition(status, new_status)]
+        skipped = [pk for pk, status in rows if not can_transition(status, new_status)]
+        if not changed:
+            return changed, skipped
+
+        now = timezone.now()
+        fields = {'status': new_status, 'updated_at': now}
+        if new_status == Status.CONFIRMED:
+            fields.update(confirmed_by=user, confirmed_at=now)
+        Rental.objects.filter(id__in=changed).update(**fields)
+
+        if new_status in RELEASING_STATUSES:
+            restore_stock(changed, user)
+
+        # update() не отправляет сигналы, календари сбрасываем сами
+        equipment_ids = list(
+            RentalItem.objects.filter(rental_id__in=changed)
+            .values_list('equipment_id', flat=True)
+            .distinct()
+        )
+        transaction.on_commit(lambda: invalidate_availability(equipment_ids))
+        # Загрузка инвентаря меняется только при отмене
+        mark_rentals(changed, usage=new_status == Status.CANCELLED)
+
+    return changed, skipped
+
+
+def transition_rental(rental, new_status, user=None):
+    """Переводит один заказ; бросает TransitionError, если переход запрещён."""
+    changed, skipped = transition_rentals([rental.pk], new_status, user)
+    if not changed:
+        raise TransitionError(
+            f'Нельзя перевести заказ №{rental.pk} из статуса '
+            f'«{rental.get_status_display()}» в «{Status(new_status).label}»'
+        )
+    rental.refresh_from_db()
+    return rental
+
+
+def _chunked_ids(queryset, field, chunk_size):
+    """id строк queryset порциями в порядке (`field`, id).
+
+    Порция выбирается условием «после последней строки» (keyset), поэтому
+    при индексе (status, `field`, id) каждый запрос читает только свою
+    порцию индекса без сортировки оставшихся строк.
+    """
+    queryset = queryset.order_by(field, 'id').values_list(field, 'id')
+    last = None
+    while True:
+        chunk = queryset
+        if last is not None:
+            value, pk = last
+            # Условие >= задаёт начало диапазона индекса, OR уточняет id
+            chunk = chunk.filter(**{f'{field}__gte': value}).filter(
+                Q(**{f'{field}__gt': value}) | Q(id__gt=pk)
+            )
+        rows = list(chunk[:chunk_size])
+        if not rows:
+            return
+        yield [pk for value, pk in rows]
+        last = rows[-1]
+
+
+def activate_due_rentals(today=None, chunk_size=1000):
+    """CONFIRMED с наступившей датой начала -> ACTIVE. Возвращает число заказов."""
+    today = today or timezone.localdate()
+    due = Rental.objects.filter(status=Status.CONFIRMED, start_date__lte=today)
+    activated = 0
+    for ids in _chunked_ids(due, 'start_date', chunk_size):
+        # Условие по статусу повторяется: заказ мог измениться после выборки.
+        # Остатки не меняются — они списаны при оформлении, а CONFIRMED и
+        # ACTIVE одинаково удерживают инвентарь по датам.
+        activated += Rental.objects.filter(
+            id__in=ids, status=Status.CONFIRMED,
+        ).update(status=Status.ACTIVE, updated_at=timezone.now())
+        mark_rentals(ids, usage=False)
+    return activated
+
+
+def flag_overdue_rentals(today=None, chunk_size=1000):
+    """Помечает ACTIVE с прошедшей датой окончания как просроченные."""
+    today = today or timezone.localdate()
+    overdue = Rental.objects.filter(status=Status.ACTIVE, end_date__lt=today, is_overdue=False)
+    flagged = 0
+    for ids in _chunked_ids(overdue, 'end_date', chunk_size):
+        flagged += Rental.objects.filter(
+            id__in=ids, status=Status.ACTIVE, is_overdue=False,
+        ).update(is_overdue=True, updated_at=timezone.now())
+    return flagged
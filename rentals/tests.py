@@ -1,3 +1,108 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from accounts.models import User
+from inventory.models import Category, Equipment
+from .checkout import place_order
+from .models import Cart, CartItem, PendingRollup, Rental, RentalItem
 
-# Create your tests here.
+
+class RentalDetailQueriesTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.client_user = User.objects.create_user(username='client', password='pass')
+        cls.manager = User.objects.create_user(
+            username='manager', password='pass', role=User.Role.MANAGER
+        )
+        category = Category.objects.create(name='Лыжи')
+        cls.equipment = [
+            Equipment.objects.create(
+                category=category,
+                name=f'Лыжи {i}',
+                slug=f'skis-{i}',
+                price_per_day=Decimal('500'),
+                quantity_total=10,
+                quantity_available=10,
+            )
+            for i in range(6)
+        ]
+        start = date.today() + timedelta(days=10)
+        cls.rental = Rental.objects.create(
+            user=cls.client_user,
+            start_date=start,
+            end_date=start + timedelta(days=2),
+            total_price=Decimal('1500'),
+            confirmed_by=cls.manager,
+        )
+
+    def add_items(self, count):
+        for equipment in self.equipment[:count]:
+            RentalItem.objects.create(
+                rental=self.rental,
+                equipment=equipment,
+                quantity=1,
+                price_per_day=equipment.price_per_day,
+                days=3,
+            )
+
+    def count_queries(self, url):
+        # Сводка корзины в шапке кэшируется, считаем запросы с пустым кэшем
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context)
+
+    def assert_flat_query_count(self, user, url):
+        self.client.force_login(user)
+        self.add_items(1)
+        one_item = self.count_queries(url)
+        RentalItem.objects.filter(rental=self.rental).delete()
+        self.add_items(6)
+        self.assertEqual(self.count_queries(url), one_item)
+
+    def test_customer_detail_query_count_is_flat(self):
+        url = reverse('rentals:rental_detail', args=[self.rental.id])
+        self.assert_flat_query_count(self.client_user, url)
+
+    def test_staff_detail_query_count_is_flat(self):
+        url = reverse('custom_admin:rental_detail', args=[self.rental.id])
+        self.assert_flat_query_count(self.manager, url)
+
+
+class CheckoutRollupsTest(TestCase):
+
+    def test_checkout_queues_usage_days(self):
+        user = User.objects.create_user(username='client', password='pass')
+        equipment = Equipment.objects.create(
+            category=Category.objects.create(name='Лыжи'),
+            name='Лыжи',
+            slug='skis',
+            price_per_day=Decimal('500'),
+            quantity_total=3,
+            quantity_available=3,
+        )
+        start = date.today() + timedelta(days=5)
+        cart = Cart.objects.create(user=user)
+        CartItem.objects.create(
+            cart=cart,
+            equipment=equipment,
+            quantity=1,
+            start_date=start,
+            end_date=start + timedelta(days=2),
+        )
+
+        place_order(user, cart)
+
+        usage_days = PendingRollup.objects.filter(
+            equipment=equipment,
+        ).order_by('day').values_list('day', flat=True)
+        self.assertEqual(
+            list(usage_days),
+            [start, start + timedelta(days=1), start + timedelta(days=2)],
+        )
@@ -19,4 +19,5 @@ urlpatterns = [
     
     # AJAX
     path('calculate-cost/', views.calculate_cost_ajax, name='calculate_cost'),
+    path('calculate-costs/', views.calculate_costs_ajax, name='calculate_costs'),
 ]
\ No newline at end of file
@@ -3,7 +3,16 @@
 """
 from decimal import Decimal
 from datetime import date, timedelta
-from .models import Cart, CartItem
+from django.core.cache import cache
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Prefetch, Sum, Value
+from django.db.models.functions import Coalesce
+from django.shortcuts import get_object_or_404
+from .models import Cart, CartItem, Rental, RentalDays, RentalItem
+from .availability import get_free_quantity, hold_expiry
+from .pricing import quote
+
+
+CART_SUMMARY_CACHE_TIMEOUT = 60 * 5
 
 
 def get_or_create_cart(user):
@@ -11,17 +20,76 @@ def get_or_create_cart(user):
     return cart
 
 
-def add_to_cart(user, equipment, quantity, start_date, end_date):
-    cart = get_or_create_cart(user)
-    
-    if equipment.quantity_available < quantity:
-        return False, "Недостаточно товара в наличии"
+def _cart_summary_key(user_id):
+    return f'cart_summary:{user_id}'
+
+
+def get_cart_totals(cart_items):
+    """Итоги по позициям корзины одним агрегирующим запросом.
+
+    Возвращает словарь с `subtotal` (без скидок), `discount`, `total`
+    и `total_items` (число позиций).
+    """
+    money = DecimalField(max_digits=12, decimal_places=2)
+    totals = cart_items.order_by().aggregate(
+        subtotal=Coalesce(
+            Sum(ExpressionWrapper(
+                F('equipment__price_per_day') * F('quantity') * RentalDays(),
+                output_field=money,
+            )),
+            Value(Decimal('0')),
+            output_field=money,
+        ),
+        discount=Coalesce(Sum('discount'), Value(Decimal('0')), output_field=money),
+        total_items=Count('id'),
+    )
+    totals['total'] = totals['subtotal'] - totals['discount']
+    return totals
+
+
+def get_cart_summary(user_id):
+    """Количество позиций и стоимость корзины пользователя.
+
+    Результат кэшируется и сбрасывается при любом изменении корзины;
+    при промахе кэша считается одним запросом без создания корзины.
+    """
+    key = _cart_summary_key(user_id)
+    summary = cache.get(key)
+    if summary is None:
+        totals = get_cart_totals(CartItem.objects.filter(cart__user_id=user_id))
+        summary = {'total_items': totals['total_items'], 'total_price': totals['total']}
+        cache.set(key, summary, CART_SUMMARY_CACHE_TIMEOUT)
+    return summary
+
+
+def invalidate_cart_summary(user_id):
+    cache.delete(_cart_summary_key(user_id))
+
+
+def validate_booking(quantity, start_date, end_date):
+    """Сообщение об ошибке для некорректных количества или дат, иначе None."""
+    if quantity < 1:
+        return "Количество должно быть не меньше 1"
     
     if start_date < date.today():
-        return False, "Дата начала не может быть в прошлом"
+        return "Дата начала не может быть в прошлом"
     
     if end_date <= start_date:
-        return False, "Дата окончания должна быть позже даты начала"
+        return "Дата окончания должна быть позже даты начала"
+    
+    return None
+
+
+def add_to_cart(user, equipment, quantity, start_date, end_date):
+    cart = get_or_create_cart(user)
+    
+    error = validate_booking(quantity, start_date, end_date)
+    if error:
+        return False, error
+    
+    free_quantity = get_free_quantity(equipment, start_date, end_date, exclude_cart_id=cart.id)
+    if free_quantity < quantity:
+        return False, "Недостаточно товара в наличии на выбранные даты"
     
     # Рассчитываем скидку
     cost_info = calculate_rental_cost(equipment, quantity, start_date, end_date)
@@ -32,19 +100,21 @@ def add_to_cart(user, equipment, quantity, start_date, end_date):
         equipment=equipment,
         start_date=start_date,
         end_date=end_date,
-        defaults={'quantity': quantity, 'discount': discount}
+        defaults={'quantity': quantity, 'discount': discount, 'held_until': hold_expiry()}
     )
     
     if not created:
         new_quantity = cart_item.quantity + quantity
-        if new_quantity > equipment.quantity_available:
+        if new_quantity > free_quantity:
             return False, "Превышено доступное количество"
         cart_item.quantity = new_quantity
         # Пересчитываем скидку с новым количеством
         cost_info = calculate_rental_cost(equipment, new_quantity, start_date, end_date)
         cart_item.discount = cost_info['discount']
+        cart_item.held_until = hold_expiry()
         cart_item.save()
     
+    invalidate_cart_summary(user.id)
     return True, "Товар добавлен в корзину"
 
 
@@ -53,6 +123,7 @@ def remove_from_cart(user, cart_item_id):
         cart = get_or_create_cart(user)
         cart_item = CartItem.objects.get(id=cart_item_id, cart=cart)
         cart_item.delete()
+        invalidate_cart_summary(user.id)
         return True, "Товар удалён из корзины"
     except CartItem.DoesNotExist:
         return False, "Товар не найден в корзине"
@@ -61,45 +132,45 @@ def remove_from_cart(user, cart_item_id):
 def update_cart_item(user, cart_item_id, quantity):
     try:
         cart = get_or_create_cart(user)
-        cart_item = CartItem.objects.get(id=cart_item_id, cart=cart)
+        cart_item = CartItem.objects.select_related('equipment').get(id=cart_item_id, cart=cart)
         
         if quantity <= 0:
             cart_item.delete()
+            invalidate_cart_summary(user.id)
             return True, "Товар удалён"
         
-        if quantity > cart_item.equipment.quantity_available:
+        free_quantity = get_free_quantity(
+            cart_item.equipment, cart_item.start_date, cart_item.end_date, exclude_cart_id=cart.id
+        )
+        if quantity > free_quantity:
             return False, "Превышено доступное количество"
         
         cart_item.quantity = quantity
         # Пересчитываем скидку с новым количеством
         cost_info = calculate_rental_cost(cart_item.equipment, quantity, cart_item.start_date, cart_item.end_date)
         cart_item.discount = cost_info['discount']
+        cart_item.held_until = hold_expiry()
         cart_item.save()
+        invalidate_cart_summary(user.id)
         return True, "Количество обновлено"
     except CartItem.DoesNotExist:
         return False, "Товар не найден"
 
 
 def calculate_rental_cost(equipment, quantity, start_date, end_date):
-    days = (end_date - start_date).days + 1
-    total = equipment.price_per_day * quantity * days
-    
-    discount = Decimal('0')
-    
-    if days >= 7:
-        discount = total * Decimal('0.10')
-    
-    elif days >= 3:
-        discount = total * Decimal('0.05')
-    
-    final_price = total - discount
-    
-    return {
-        'base_price': equipment.price_per_day,
-        'quantity': quantity,
-        'days': days,
-        'subtotal': total,
-        'discount': discount,
-        'discount_percent': (discount / total * 100) if total > 0 else 0,
-        'total': final_price,
-    }
\ No newline at end of file
+    return quote(equipment.price_per_day, quantity, start_date, end_date)
+
+
+def get_rental_detail(**lookup):
+    """Заказ для страницы просмотра (клиентской и в админке) или 404.
+
+    Клиент, подтвердивший сотрудник, позиции, инвентарь и категории
+    загружаются двумя запросами независимо от числа позиций.
+    """
+    items = RentalItem.objects.select_related('equipment__category').order_by('id')
+    return get_object_or_404(
+        Rental.objects.select_related('user', 'confirmed_by').prefetch_related(
+            Prefetch('items', queryset=items)
+        ),
+        **lookup
+    )
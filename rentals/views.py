@@ -2,16 +2,31 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
-from datetime import date, timedelta
-from .models import Rental, CartItem
-from .utils import get_or_create_cart, add_to_cart, remove_from_cart, update_cart_item, calculate_rental_cost
+import json
+import uuid
+from datetime import date, datetime, timedelta
+from django.db.models import Count, Prefetch
+from core.pagination import paginate
+from .models import Rental, RentalItem, CartItem
+from .utils import get_or_create_cart, add_to_cart, remove_from_cart, update_cart_item, calculate_rental_cost, get_cart_summary, get_rental_detail, validate_booking
+from .checkout import CheckoutError, find_placed_order, place_order
+from .pricing import quote_many
 from inventory.models import Equipment
 
 
+# Максимум позиций в одном запросе расчёта стоимости
+MAX_QUOTE_ITEMS = 100
+
+RENTALS_PAGE_SIZE = 10
+
+# Сколько позиций заказа показывать миниатюрами в истории
+RENTAL_PREVIEW_ITEMS = 3
+
+
 @login_required
 def cart_view(request):
     cart = get_or_create_cart(request.user)
-    cart_items = cart.items.all().select_related('equipment')
+    cart_items = cart.items.all().select_related('equipment__category')
     
     context = {
         'cart': cart,
@@ -77,13 +92,13 @@ def update_cart_item_view(request, cart_item_id):
         quantity = int(request.POST.get('quantity', 1))
         success, message = update_cart_item(request.user, cart_item_id, quantity)
         
-        cart = get_or_create_cart(request.user)
+        summary = get_cart_summary(request.user.id)
         
         return JsonResponse({
             'success': success,
             'message': message,
-            'cart_total': float(cart.total_price),
-            'cart_items_count': cart.total_items,
+            'cart_total': float(summary['total_price']),
+            'cart_items_count': summary['total_items'],
         })
     
     return JsonResponse({'success': False, 'message': 'Метод не поддерживается'})
@@ -91,6 +106,16 @@ def update_cart_item_view(request, cart_item_id):
 
 @login_required
 def checkout_view(request):
+    idempotency_key = (
+        request.POST.get('idempotency_key') or request.headers.get('Idempotency-Key') or ''
+    )[:64]
+    
+    if request.method == 'POST':
+        # Повтор уже выполненного запроса: корзина к этому моменту пуста
+        rental = find_placed_order(request.user, idempotency_key)
+        if rental is not None:
+            return redirect('rentals:rental_detail', rental_id=rental.id)
+    
     cart = get_or_create_cart(request.user)
     
     if not cart.items.exists():
@@ -100,39 +125,24 @@ def checkout_view(request):
     if request.method == 'POST':
         comment = request.POST.get('comment', '')
         
-        first_item = cart.items.first()
-        
-        rental = Rental.objects.create(
-            user=request.user,
-            start_date=first_item.start_date,
-            end_date=first_item.end_date,
-            total_price=cart.total_price,
-            comment=comment,
-            status=Rental.Status.PENDING
-        )
-        
-        from .models import RentalItem
-        
-        for cart_item in cart.items.all():
-            RentalItem.objects.create(
-                rental=rental,
-                equipment=cart_item.equipment,
-                quantity=cart_item.quantity,
-                price_per_day=cart_item.equipment.price_per_day,
-                days=cart_item.days,
-            )
-            
-            cart_item.equipment.quantity_available -= cart_item.quantity
-            cart_item.equipment.save()
-        
-        cart.clear()
+        try:
+            rental = place_order(request.user, cart, comment, idempotency_key)
+        except CheckoutError as error:
+            for cart_item in error.unavailable:
+                messages.error(
+                    request,
+                    f'{cart_item.equipment.name}: недостаточно свободных единиц '
+                    f'на {cart_item.start_date:%d.%m.%Y} - {cart_item.end_date:%d.%m.%Y}'
+                )
+            return redirect('rentals:cart')
         
         messages.success(request, f'Заказ №{rental.id} успешно создан! Ожидайте подтверждения.')
         return redirect('rentals:rental_detail', rental_id=rental.id)
     
     context = {
         'cart': cart,
-        'cart_items': cart.items.all(),
+        'cart_items': cart.items.select_related('equipment__category'),
+        'idempotency_key': uuid.uuid4().hex,
     }
     
     return render(request, 'rentals/checkout.html', context)
@@ -140,10 +150,28 @@ def checkout_view(request):
 
 @login_required
 def my_rentals_view(request):
-    rentals = Rental.objects.filter(user=request.user).order_by('-created_at')
+    rentals = Rental.objects.filter(user=request.user).annotate(
+        item_count=Count('items'),
+    ).prefetch_related(
+        Prefetch(
+            'items',
+            queryset=RentalItem.objects.select_related('equipment').order_by('id')[:RENTAL_PREVIEW_ITEMS],
+            to_attr='preview_items',
+        )
+    )
+    
+    status = request.GET.get('status', '')
+    if status in Rental.Status.values:
+        rentals = rentals.filter(status=status)
+    
+    page, pagination_query = paginate(request, rentals, '-created_at', per_page=RENTALS_PAGE_SIZE)
     
     context = {
-        'rentals': rentals,
+        'rentals': page,
+        'page': page,
+        'pagination_query': pagination_query,
+        'statuses': Rental.Status.choices,
+        'selected_status': status,
     }
     
     return render(request, 'rentals/my_rentals.html', context)
@@ -151,7 +179,7 @@ def my_rentals_view(request):
 
 @login_required
 def rental_detail_view(request, rental_id):
-    rental = get_object_or_404(Rental, id=rental_id, user=request.user)
+    rental = get_rental_detail(id=rental_id, user=request.user)
     
     context = {
         'rental': rental,
@@ -160,6 +188,18 @@ def rental_detail_view(request, rental_id):
     return render(request, 'rentals/rental_detail.html', context)
 
 
+def _serialize_cost(cost_data):
+    return {
+        'base_price': float(cost_data['base_price']),
+        'quantity': cost_data['quantity'],
+        'days': cost_data['days'],
+        'subtotal': float(cost_data['subtotal']),
+        'discount': float(cost_data['discount']),
+        'discount_percent': float(cost_data['discount_percent']),
+        'total': float(cost_data['total']),
+    }
+
+
 @login_required
 def calculate_cost_ajax(request):
     if request.method == 'POST':
@@ -179,17 +219,52 @@ def calculate_cost_ajax(request):
             
             return JsonResponse({
                 'success': True,
-                'data': {
-                    'base_price': float(cost_data['base_price']),
-                    'quantity': cost_data['quantity'],
-                    'days': cost_data['days'],
-                    'subtotal': float(cost_data['subtotal']),
-                    'discount': float(cost_data['discount']),
-                    'discount_percent': float(cost_data['discount_percent']),
-                    'total': float(cost_data['total']),
-                }
+                'data': _serialize_cost(cost_data),
             })
         except Exception as e:
             return JsonResponse({'success': False, 'error': str(e)})
     
-    return JsonResponse({'success': False, 'error': 'Метод не поддерживается'})
\ No newline at end of file
+    return JsonResponse({'success': False, 'error': 'Метод не поддерживается'})
+
+
+@login_required
+def calculate_costs_ajax(request):
+    """Расчёт стоимости для нескольких позиций за один запрос.
+
+    Тело запроса — JSON {"items": [{"equipment_id", "quantity", "start_date",
+    "end_date"}, ...]}; ответ содержит расчёты в том же порядке. Для
+    позиции с некорректным количеством или датами вместо расчёта
+    возвращается {"error": ...}.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Метод не поддерживается'})
+    
+    try:
+        items = json.loads(request.body)['items'][:MAX_QUOTE_ITEMS]
+        lines = [
+            (
+                int(item['equipment_id']),
+                int(item.get('quantity', 1)),
+                datetime.strptime(item['start_date'], '%Y-%m-%d').date(),
+                datetime.strptime(item['end_date'], '%Y-%m-%d').date(),
+            )
+            for item in items
+        ]
+    except (ValueError, TypeError, KeyError):
+        return JsonResponse({'success': False, 'error': 'Некорректные данные'})
+    
+    errors = [validate_booking(*line[1:]) for line in lines]
+    quotes = quote_many(line for line, error in zip(lines, errors) if not error)
+    
+    data = []
+    for error in errors:
+        if error:
+            data.append({'error': error})
+        else:
+            cost_data = quotes.pop(0)
+            data.append(_serialize_cost(cost_data) if cost_data else None)
+    
+    return JsonResponse({
+        'success': True,
+        'data': data,
+    })